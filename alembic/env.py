@@ -1,15 +1,15 @@
-import os
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
-from dotenv import load_dotenv
 
 from alembic import context
 
 # ADD THESE TWO LINES
 from app.db.session import Base  # Import your Base
 from app.models import models # Make sure all models are imported
+from app.core.config import settings
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -20,10 +20,8 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
     
-# ADD THIS SECTION TO LOAD .env
-# This will ensure that the DATABASE_URL is loaded from your .env file
-load_dotenv()
-db_url = os.getenv("DATABASE_MIGRATION_URL")
+# DATABASE_MIGRATION_URL comes from the environment or the .env file
+db_url = settings.DATABASE_MIGRATION_URL
 if not db_url:
     raise ValueError("DATABASE_MIGRATION_URL is not set in environment")
 config.set_main_option("sqlalchemy.url", db_url)
@@ -31,6 +29,16 @@ config.set_main_option("sqlalchemy.url", db_url)
 
 target_metadata = Base.metadata
 
+# Month partitions of the archive tables are created at runtime by the archival job,
+# not by migrations, so autogenerate must not try to drop them.
+ARCHIVE_PARTITION = re.compile(r"_archive_\d{4}_\d{2}$")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and compare_to is None and ARCHIVE_PARTITION.search(name):
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -53,6 +61,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -76,7 +85,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,28 @@
+"""Add bookings booked_at index
+
+Revision ID: 3c7e9b2d5f40
+Revises: f2b8d4e6a913
+Create Date: 2026-10-19 20:41:17.204596
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e9b2d5f40'
+down_revision: Union[str, Sequence[str], None] = 'f2b8d4e6a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_bookings_booked_at', 'bookings', ['booked_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bookings_booked_at', table_name='bookings')
@@ -0,0 +1,34 @@
+"""Add booked_seats within capacity check constraint
+
+Revision ID: 5b7d2e91c4a3
+Revises: a048914af1e1
+Create Date: 2026-10-19 10:02:11.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d2e91c4a3'
+down_revision: Union[str, Sequence[str], None] = 'a048914af1e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Bookings now claim seats with a conditional UPDATE; the database guarantees
+    # the counter can never overshoot capacity even if a code path forgets the check.
+    op.create_check_constraint(
+        'ck_events_booked_seats_within_capacity',
+        'events',
+        'booked_seats >= 0 AND booked_seats <= capacity',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ck_events_booked_seats_within_capacity', 'events', type_='check')
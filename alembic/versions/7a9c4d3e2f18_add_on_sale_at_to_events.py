@@ -0,0 +1,28 @@
+"""Add on_sale_at to events
+
+Revision ID: 7a9c4d3e2f18
+Revises: e41f7c2b8a05
+Create Date: 2026-10-19 13:55:32.604711
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a9c4d3e2f18'
+down_revision: Union[str, Sequence[str], None] = 'e41f7c2b8a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('on_sale_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('events', 'on_sale_at')
@@ -0,0 +1,39 @@
+"""Add event search indexes
+
+Revision ID: b8f3e6a41d27
+Revises: 7a9c4d3e2f18
+Create Date: 2026-10-19 15:12:08.318402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8f3e6a41d27'
+down_revision: Union[str, Sequence[str], None] = '7a9c4d3e2f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_events_status_event_time', 'events', ['status', 'event_time'], unique=False)
+    op.create_index(
+        'ix_events_name_trgm', 'events', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_events_venue_trgm', 'events', ['venue'], unique=False,
+        postgresql_using='gin', postgresql_ops={'venue': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_venue_trgm', table_name='events')
+    op.drop_index('ix_events_name_trgm', table_name='events')
+    op.drop_index('ix_events_status_event_time', table_name='events')
@@ -0,0 +1,40 @@
+"""Add sharded seat counters
+
+Revision ID: c3e8a1f0d9b6
+Revises: 5b7d2e91c4a3
+Create Date: 2026-10-19 11:20:45.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a1f0d9b6'
+down_revision: Union[str, Sequence[str], None] = '5b7d2e91c4a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('shard_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('bookings', sa.Column('seat_shard', sa.Integer(), nullable=True))
+    op.create_table('event_seat_shards',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('shard_no', sa.Integer(), nullable=False),
+    sa.Column('capacity', sa.Integer(), nullable=False),
+    sa.Column('booked_seats', sa.Integer(), nullable=False),
+    sa.CheckConstraint('booked_seats >= 0 AND booked_seats <= capacity', name='ck_event_seat_shards_booked_seats_within_capacity'),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.PrimaryKeyConstraint('event_id', 'shard_no')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('event_seat_shards')
+    op.drop_column('bookings', 'seat_shard')
+    op.drop_column('events', 'shard_count')
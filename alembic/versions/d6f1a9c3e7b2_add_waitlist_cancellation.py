@@ -0,0 +1,44 @@
+"""Add waitlist cancellation
+
+Revision ID: d6f1a9c3e7b2
+Revises: b8f3e6a41d27
+Create Date: 2026-10-19 17:03:41.552183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f1a9c3e7b2'
+down_revision: Union[str, Sequence[str], None] = 'b8f3e6a41d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block on older Postgres.
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE waitliststatus ADD VALUE IF NOT EXISTS 'CANCELLED'")
+    op.create_index(
+        'ix_waitlist_entries_pending_event_created', 'waitlist_entries', ['event_id', 'created_at'],
+        unique=False, postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_waitlist_entries_pending_event_created', table_name='waitlist_entries')
+    # Postgres cannot drop an enum value, so the type is recreated without it.
+    # Cancelled entries have no equivalent in the old schema and are removed.
+    op.execute("DELETE FROM waitlist_entries WHERE status = 'CANCELLED'")
+    op.execute("ALTER TYPE waitliststatus RENAME TO waitliststatus_old")
+    op.execute("CREATE TYPE waitliststatus AS ENUM ('PENDING', 'FULFILLED')")
+    op.execute(
+        "ALTER TABLE waitlist_entries ALTER COLUMN status TYPE waitliststatus "
+        "USING status::text::waitliststatus"
+    )
+    op.execute("DROP TYPE waitliststatus_old")
@@ -0,0 +1,48 @@
+"""Add seat holds table
+
+Revision ID: e41f7c2b8a05
+Revises: c3e8a1f0d9b6
+Create Date: 2026-10-19 12:41:07.215530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41f7c2b8a05'
+down_revision: Union[str, Sequence[str], None] = 'c3e8a1f0d9b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('seat_holds',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('tickets', sa.Integer(), nullable=False),
+    sa.Column('seat_shard', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('HELD', 'CONFIRMED', 'RELEASED', 'EXPIRED', name='holdstatus'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_seat_holds_id'), 'seat_holds', ['id'], unique=False)
+    op.create_index(
+        'ix_seat_holds_active_expires_at', 'seat_holds', ['expires_at'],
+        unique=False, postgresql_where=sa.text("status = 'HELD'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_seat_holds_active_expires_at', table_name='seat_holds')
+    op.drop_index(op.f('ix_seat_holds_id'), table_name='seat_holds')
+    op.drop_table('seat_holds')
+    sa.Enum(name='holdstatus').drop(op.get_bind())
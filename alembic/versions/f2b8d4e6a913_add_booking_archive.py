@@ -0,0 +1,94 @@
+"""Add booking archive
+
+Revision ID: f2b8d4e6a913
+Revises: d6f1a9c3e7b2
+Create Date: 2026-10-19 18:27:55.904316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4e6a913'
+down_revision: Union[str, Sequence[str], None] = 'd6f1a9c3e7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    booking_status = postgresql.ENUM('CONFIRMED', 'CANCELLED', name='bookingstatus', create_type=False)
+    waitlist_status = postgresql.ENUM(
+        'PENDING', 'FULFILLED', 'CANCELLED', name='waitliststatus', create_type=False
+    )
+
+    op.add_column('events', sa.Column('archived_at', sa.DateTime(), nullable=True))
+
+    # Month partitions are created by the archival job as it reaches each month.
+    op.create_table('bookings_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('event_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('tickets_booked', sa.Integer(), nullable=False),
+    sa.Column('status', booking_status, nullable=False),
+    sa.Column('booked_at', sa.DateTime(), nullable=True),
+    sa.Column('seat_shard', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'event_time'),
+    postgresql_partition_by='RANGE (event_time)',
+    )
+    op.create_index('ix_bookings_archive_user_id', 'bookings_archive', ['user_id'], unique=False)
+    op.create_index('ix_bookings_archive_event_id', 'bookings_archive', ['event_id'], unique=False)
+
+    op.create_table('waitlist_entries_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('event_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('tickets_requested', sa.Integer(), nullable=False),
+    sa.Column('status', waitlist_status, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'event_time'),
+    postgresql_partition_by='RANGE (event_time)',
+    )
+    op.create_index('ix_waitlist_entries_archive_user_id', 'waitlist_entries_archive', ['user_id'], unique=False)
+
+    op.create_table('event_booking_stats',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('confirmed_bookings', sa.Integer(), nullable=False),
+    sa.Column('cancelled_bookings', sa.Integer(), nullable=False),
+    sa.Column('tickets_booked', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    op.create_table('booking_daily_stats',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('booking_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Archived rows go back to the hot tables before the archive is dropped.
+    op.execute(
+        "INSERT INTO bookings (id, user_id, event_id, tickets_booked, status, booked_at, seat_shard) "
+        "SELECT id, user_id, event_id, tickets_booked, status, booked_at, seat_shard FROM bookings_archive"
+    )
+    op.execute(
+        "INSERT INTO waitlist_entries (id, user_id, event_id, tickets_requested, status, created_at) "
+        "SELECT id, user_id, event_id, tickets_requested, status, created_at FROM waitlist_entries_archive"
+    )
+    op.drop_table('booking_daily_stats')
+    op.drop_table('event_booking_stats')
+    # Dropping a partitioned table drops its partitions.
+    op.drop_index('ix_waitlist_entries_archive_user_id', table_name='waitlist_entries_archive')
+    op.drop_table('waitlist_entries_archive')
+    op.drop_index('ix_bookings_archive_event_id', table_name='bookings_archive')
+    op.drop_index('ix_bookings_archive_user_id', table_name='bookings_archive')
+    op.drop_table('bookings_archive')
+    op.drop_column('events', 'archived_at')
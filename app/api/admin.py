@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends
+import redis.asyncio as redis
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
@@ -6,6 +7,10 @@ from app.schemas import schemas
 from app.models import models
 from app.crud import analytics as analytics_crud
 from app.api.dependencies import get_current_admin_user
+from app.core.responses import model_response, RawJSONResponse
+from app.core.redis_client import get_redis_client, get_redis_bytes_client
+from app.core import profiling
+from app.services import redis_memory, event_cache
 
 router = APIRouter(tags=["Admin"])
 
@@ -17,4 +22,70 @@ async def get_system_analytics(
     """
     Retrieve system-wide analytics. Only accessible by admin users.
     """
-    return await analytics_crud.get_analytics_overview(db=db)
\ No newline at end of file
+    overview = await analytics_crud.get_analytics_overview(db=db)
+    return model_response(schemas.AnalyticsOverview, overview)
+
+@router.get("/redis/memory")
+async def get_redis_memory_report(
+    admin_user: models.User = Depends(get_current_admin_user),
+):
+    """
+    Memory used per key family (event caches, waiting rooms, Celery broker and results)
+    on each Redis used by the app. Scans a bounded number of keys. Only accessible by
+    admin users.
+    """
+    report = []
+    for url, roles in redis_memory.redis_roles().items():
+        client = redis.Redis.from_url(url)
+        try:
+            report.append({"roles": roles, **await redis_memory.memory_report(client)})
+        except redis.RedisError as exc:
+            report.append({"roles": roles, "error": str(exc)})
+        finally:
+            await client.aclose()
+    return report
+
+@router.post("/cache/prewarm")
+async def prewarm_cache(
+    db: AsyncSession = Depends(get_db),
+    admin_user: models.User = Depends(get_current_admin_user),
+):
+    """
+    Load the first event list pages and the hottest upcoming events into the cache now,
+    e.g. right before a big on-sale or after a Redis flush. The same job runs on a beat
+    schedule and at startup. Only accessible by admin users.
+    """
+    pages, events = await event_cache.prewarm(get_redis_client(), db)
+    return {"list_pages": pages, "events": events}
+
+async def _read_profile(profile_id: str, field: str) -> bytes:
+    body = await get_redis_bytes_client().hget(profiling.profile_key(profile_id), field)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Profile not found or expired")
+    return body
+
+@router.get("/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    admin_user: models.User = Depends(get_current_admin_user),
+):
+    """
+    The speedscope profile of a request sent with `X-Profile: 1` or `?profile=1`,
+    as named in its `X-Profile` response header. Open it at https://www.speedscope.app.
+    Only accessible by admin users.
+    """
+    return RawJSONResponse(
+        content=await _read_profile(profile_id, "speedscope"),
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'},
+    )
+
+@router.get("/profiles/{profile_id}/sql")
+async def get_request_profile_sql(
+    profile_id: str,
+    admin_user: models.User = Depends(get_current_admin_user),
+):
+    """
+    The SQL statements a profiled request executed, with their start offsets and
+    durations, plus the request's status and total time. Only accessible by admin users.
+    """
+    return RawJSONResponse(content=await _read_profile(profile_id, "sql"))
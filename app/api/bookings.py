@@ -1,22 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Union
-from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from typing import List, Literal, Union
+import orjson
 
 from app.db.session import get_db
 from app.schemas import schemas
 from app.models import models
 from app.crud import booking as booking_crud
+from app.crud import waitlist as waitlist_crud
 from app.api.dependencies import get_current_user
-
-from app.workers.tasks import process_booking_task
+from app.core.query_counter import query_budget
+from app.core.redis_client import get_redis_client, get_redis_bytes_client, get_waiting_room_client
+from app.core.responses import RawJSONResponse
+from app.services import waiting_room, availability, booking_cache, event_cache, waitlist_index
+from app.workers import producer
 
 
 router = APIRouter(tags=["Bookings"])
 
 
 @router.post("/bookings", status_code=status.HTTP_202_ACCEPTED)
+@query_budget(1)
 async def request_booking(
     booking: schemas.BookingCreate,
     current_user: models.User = Depends(get_current_user),
@@ -25,24 +29,86 @@ async def request_booking(
     """
     Accept a booking request and add it to the processing queue.
     Responds immediately and processes the booking in the background.
+    During a scheduled on-sale, only users admitted from the waiting room get through.
     """
-    process_booking_task.delay(
-        booking_data=booking.model_dump(), user_id=current_user.id
+    await waiting_room.check_admission(
+        get_waiting_room_client(), booking.event_id, current_user.id, booking.queue_token
+    )
+    producer.enqueue(
+        "process_booking", booking_data=booking.model_dump(), user_id=current_user.id
     )
     
     return {"message": "Your booking request has been received and is being processed."}
 
-@router.get("/users/me/bookings", response_model=List[schemas.Booking])
+@router.post("/bookings/cart", status_code=status.HTTP_202_ACCEPTED)
+@query_budget(1)
+async def request_cart_booking(
+    cart: schemas.CartBookingCreate,
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Accept a booking request for several events at once and add it to the processing
+    queue as a single task. The cart is booked in one transaction, either all or
+    nothing (default) or best effort.
+    """
+    redis_client = get_waiting_room_client()
+    for event_id in sorted({line.event_id for line in cart.lines}):
+        await waiting_room.check_admission(
+            redis_client, event_id, current_user.id, cart.queue_tokens.get(event_id)
+        )
+    producer.enqueue("process_cart_booking", cart_data=cart.model_dump(), user_id=current_user.id)
+
+    return {"message": "Your cart booking request has been received and is being processed."}
+
+@router.get(
+    "/users/me/bookings",
+    response_model=Union[List[schemas.Booking], List[schemas.BookingSummary], schemas.BookingsNormalized],
+)
+# The user lookup, then a missed history and some missed event bodies.
+@query_budget(3)
 async def read_user_bookings(
+    view: Literal["full", "summary", "normalized"] = "full",
     db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
     Retrieve all bookings for the currently authenticated user.
+    `view=full` embeds the event in every booking, `view=summary` returns bookings with
+    only an `event_id`, and `view=normalized` returns `{bookings, events}` with each
+    event listed once.
+    Bookings come from the user's cached history, which every booking change writes
+    through to, and events from the per-event cache entries shared with `GET /events`,
+    so a warm read does not touch the database.
     """
-    return await booking_crud.get_bookings_by_user(db=db, user_id=current_user.id)
+    redis_client = get_redis_bytes_client()
+    bookings = await booking_cache.get_bookings(redis_client, db, current_user.id)
+    if view == "summary":
+        return RawJSONResponse(b"[" + b",".join(bookings) + b"]")
+
+    event_ids = [orjson.loads(booking)["event_id"] for booking in bookings]
+    events = await event_cache.get_event_bodies(redis_client, db, sorted(set(event_ids)))
+    if view == "full":
+        # Splice the user and the rendered event into each cached summary. Events missing
+        # from the cache were loaded from the database above; an archived booking whose
+        # event has since been deleted is still listed, with a null event.
+        return RawJSONResponse(b"[" + b",".join(
+            booking[:-1] + b',"user_id":%d,"event":%b}' % (current_user.id, events.get(event_id, b"null"))
+            for booking, event_id in zip(bookings, event_ids)
+        ) + b"]")
+
+    summary_fields = list(schemas.EventSummary.model_fields)
+    return RawJSONResponse(
+        b'{"bookings":[' + b",".join(bookings) + b'],"events":'
+        + orjson.dumps([
+            {name: event[name] for name in summary_fields}
+            for event in map(orjson.loads, (events[event_id] for event_id in sorted(events)))
+        ])
+        + b"}"
+    )
 
 @router.post("/bookings/{booking_id}/cancel", response_model=schemas.Booking)
+# Worst case is a waitlist promotion that has to rebalance a sharded event.
+@query_budget(11)
 async def cancel_a_booking(
     booking_id: int,
     db: AsyncSession = Depends(get_db),
@@ -51,13 +117,7 @@ async def cancel_a_booking(
     """
     Cancel a booking. A user can only cancel their own bookings.
     """
-
-    result = await db.execute(
-        select(models.Booking)
-        .options(selectinload(models.Booking.event))
-        .filter(models.Booking.id == booking_id)
-    )
-    booking_to_cancel = result.scalars().first()
+    booking_to_cancel = await booking_crud.get_booking_for_update(db, booking_id=booking_id)
     
     if not booking_to_cancel:
         raise HTTPException(status_code=404, detail="Booking not found")
@@ -69,4 +129,50 @@ async def cancel_a_booking(
             detail="You do not have permission to cancel this booking",
         )
 
-    return await booking_crud.cancel_booking(db=db, booking=booking_to_cancel)
\ No newline at end of file
+    cancelled_booking, promoted = await booking_crud.cancel_booking(db=db, booking=booking_to_cancel)
+
+    redis_client = get_redis_client()
+    await booking_cache.record(
+        redis_client, [cancelled_booking] if promoted is None else [cancelled_booking, promoted]
+    )
+    if promoted is not None:
+        await waitlist_index.remove(redis_client, [promoted])
+    if cancelled_booking.seat_shard is None and not cancelled_booking.event.shard_count:
+        await availability.publish_event_state(redis_client, cancelled_booking.event)
+    else:
+        await availability.publish_seat_change(
+            redis_client, cancelled_booking.event_id, delta=-cancelled_booking.tickets_booked
+        )
+
+    return cancelled_booking
+
+@router.get("/events/{event_id}/waitlist/me", response_model=schemas.WaitlistPosition)
+# The user lookup, then rebuilding a missed index.
+@query_budget(2)
+async def read_waitlist_position(
+    event_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Your place in an event's waitlist and the tickets requested ahead of you.
+    Served from a Redis index of the pending entries, kept up to date on every
+    waitlist change, instead of re-submitting the booking to find out.
+    """
+    position = await waitlist_index.get_position(get_redis_client(), db, event_id, current_user.id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="You are not on the waitlist for this event")
+    return position
+
+@router.delete("/events/{event_id}/waitlist/me", status_code=status.HTTP_204_NO_CONTENT)
+async def leave_waitlist(
+    event_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Leave an event's waitlist.
+    """
+    entry = await waitlist_crud.cancel_waitlist_entry(db, event_id=event_id, user_id=current_user.id)
+    await waitlist_index.remove(get_redis_client(), [entry])
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,16 +1,21 @@
-import json
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Union
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
 
-from app.core.redis_client import get_redis_client
+from app.core.redis_client import get_redis_client, get_redis_bytes_client, get_redis_pubsub_client, get_waiting_room_client
 from app.db.session import get_db
 from app.schemas import schemas
 from app.models import models
 from app.crud import event as event_crud
-from app.api.dependencies import get_current_admin_user
+from app.crud import seat_shard as seat_shard_crud
+from app.api.dependencies import get_current_admin_user, get_current_user
+from app.services import waiting_room, availability, event_import, response_cache, event_cache, booking_cache, waitlist_index
+from app.core.query_counter import query_budget
 
 router = APIRouter(tags=["Events"])
 
@@ -25,56 +30,158 @@ async def create_new_event(
     """
     new_event = await event_crud.create_event(db=db, event=event, creator_id=admin_user.id)
     
-    redis_client = get_redis_client()
-    keys_to_delete = await redis_client.keys("events:all:*")
-    if keys_to_delete:
-        await redis_client.delete(*keys_to_delete)
-        
+    await waiting_room.publish_on_sale(get_waiting_room_client(), new_event.id, new_event.on_sale_at)
+    await event_cache.invalidate(get_redis_client(), lists=True)
+
     return new_event
 
-@router.get("/events", response_model=List[schemas.Event])
-async def read_events(
-    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)
+@router.post("/events/bulk", response_model=schemas.EventBulkResult)
+async def bulk_import_events(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    admin_user: models.User = Depends(get_current_admin_user),
 ):
     """
-    Retrieve a list of all upcoming active events. This is a public endpoint.
-    Results are cached for 5 minutes.
+    Create or update many events from a JSON array, NDJSON or CSV body (by Content-Type).
+    Rows with an `id` update that event. Invalid rows are reported by row number and
+    skipped; valid rows are written in batches. Only accessible by admin users.
     """
+    created, updated, errors = [], [], []
+    on_sale_changes = {}
+    updated_events = []
+    batch = []
+
+    async def flush():
+        batch_created, batch_updated, batch_errors = await event_crud.bulk_write_events(
+            db, batch, creator_id=admin_user.id
+        )
+        written = iter(batch_created)
+        failed = {error["row"] for error in batch_errors}
+        for row_no, row in batch:
+            if row_no in failed:
+                continue
+            event_id = row.id if row.id is not None else next(written)
+            # Updates that leave on_sale_at out keep the event's waiting room as it is.
+            if "on_sale_at" in row.model_fields_set:
+                on_sale_changes[event_id] = row.on_sale_at
+        # Rows may leave columns out, so subscribers get the stored state.
+        if batch_updated:
+            updated_events.extend(await event_crud.get_events_by_ids(db, batch_updated))
+        created.extend(batch_created)
+        updated.extend(batch_updated)
+        errors.extend(batch_errors)
+        batch.clear()
+
+    async for row_no, row, row_errors in event_import.parse_rows(request):
+        if row is None:
+            errors.append({"row": row_no, "errors": row_errors})
+            continue
+        batch.append((row_no, row))
+        if len(batch) >= event_import.BULK_EVENT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+
+    # Cache invalidation and waiting room updates happen once per import, not per row.
     redis_client = get_redis_client()
-    cache_key = f"events:all:{skip}:{limit}"
+    for event_id, on_sale_at in on_sale_changes.items():
+        await waiting_room.publish_on_sale(get_waiting_room_client(), event_id, on_sale_at)
+    for event in updated_events:
+        await availability.publish_event_state(redis_client, event)
+    if created or updated:
+        await event_cache.invalidate(redis_client, *updated, lists=True)
 
-    cached_events = await redis_client.get(cache_key)
-    if cached_events:
-        list_of_json_strings = json.loads(cached_events)
-        return [schemas.Event.model_validate_json(s) for s in list_of_json_strings]
+    errors.sort(key=lambda error: error["row"])
+    return {"created": created, "updated": updated, "errors": errors}
 
-    events = await event_crud.get_events(db, skip=skip, limit=limit)
-    
-    events_for_cache = [schemas.Event.model_validate(e).model_dump_json() for e in events]
-    await redis_client.set(cache_key, json.dumps(events_for_cache), ex=300) 
-    return events
+EVENT_VIEWS = {"full": None, "summary": list(schemas.EventSummary.model_fields)}
 
-@router.get("/events/{event_id}", response_model=schemas.Event)
-async def read_event(event_id: int, db: AsyncSession = Depends(get_db)):
+def parse_event_fields(fields: Optional[str], view: str) -> Optional[List[str]]:
     """
-    Retrieve details for a single event. This is a public endpoint.
-    Results are cached for 5 minutes.
+    Column names for a sparse event listing, in schema order with `id` always included,
+    or None for full events.
     """
-    redis_client = get_redis_client()
-    cache_key = f"event:{event_id}"
+    if not fields:
+        return EVENT_VIEWS[view]
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schemas.Event.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return [name for name in schemas.Event.model_fields if name in requested or name == "id"]
 
-    cached_event = await redis_client.get(cache_key)
-    if cached_event:
-        return schemas.Event.model_validate_json(cached_event)
+@router.get(
+    "/events",
+    response_model=Union[List[schemas.Event], List[schemas.EventSummary], List[Dict[str, Any]]],
+)
+# The cached id list misses, then some event bodies miss.
+@query_budget(2)
+async def read_events(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    venue: Optional[str] = Query(None, max_length=200),
+    starts_after: Optional[datetime] = None,
+    starts_before: Optional[datetime] = None,
+    upcoming: bool = False,
+    q: Optional[str] = Query(None, max_length=100, description="Search event names and venues"),
+    view: Literal["full", "summary"] = "full",
+    fields: Optional[str] = Query(None, description="Comma-separated event fields to return"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Retrieve active events ordered by start time, optionally filtered by venue, start
+    time range, upcoming only, or a free-text search. This is a public endpoint.
+    `view=summary` or `fields=` returns only some fields.
+    Each query caches only its ordered event ids; the events themselves come from the
+    per-event cache entries shared with `GET /events/{id}`, so changing one event
+    invalidates one key. Responses are compressed when the client accepts it, once per
+    distinct page, and answered with 304 when the client's ETag still matches.
+    """
+    columns = parse_event_fields(fields, view)
+    filters = {
+        "venue": venue.strip() if venue else None,
+        "starts_after": starts_after,
+        "starts_before": starts_before,
+        "upcoming": upcoming,
+        "q": q.strip() if q else None,
+    }
+    event_ids = await event_cache.get_event_ids(
+        get_redis_client(), db, skip=skip, limit=limit, filters=filters
+    )
+    redis_bytes_client = get_redis_bytes_client()
+    bodies = await event_cache.get_event_bodies(redis_bytes_client, db, event_ids)
+    page = [bodies[event_id] for event_id in event_ids if event_id in bodies]
 
-    db_event = await event_crud.get_event(db, event_id=event_id)
-    if db_event is None:
-        raise HTTPException(status_code=404, detail="Event not found")
+    if columns is None:
+        body = b"[" + b",".join(page) + b"]"
+    else:
+        body = orjson.dumps([
+            {name: event[name] for name in columns}
+            for event in map(orjson.loads, page)
+        ])
+    return await response_cache.render(request, body, redis_bytes_client)
 
-    event_for_cache = schemas.Event.model_validate(db_event).model_dump_json()
-    await redis_client.set(cache_key, event_for_cache, ex=300) 
+@router.get("/events/{event_id}", response_model=schemas.Event)
+@query_budget(1)
+async def read_event(request: Request, event_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Retrieve details for a single event. This is a public endpoint.
+    Results are cached for 5 minutes in the per-event entry shared with `GET /events`.
+    ETag and Last-Modified come from the event's updated_at, so a conditional request
+    is answered with 304 straight from the cache.
+    """
+    redis_bytes_client = get_redis_bytes_client()
+    body = (await event_cache.get_event_bodies(redis_bytes_client, db, [event_id])).get(event_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Event not found")
 
-    return db_event
+    etag, last_modified = event_cache.validators(body)
+    return await response_cache.render(
+        request, body, redis_bytes_client, etag=etag, last_modified=last_modified
+    )
 
 @router.put("/events/{event_id}", response_model=schemas.Event)
 async def update_event(
@@ -94,15 +201,48 @@ async def update_event(
         # Allow any admin to update
         pass
 
+    # Only these decide which lists an event appears in, and where.
+    listed_as = (event_to_update.name, event_to_update.venue, event_to_update.event_time)
+
     updated_event = await event_crud.update_event(
         db=db, event_to_update=event_to_update, event_in=event_in
     )
 
+    await waiting_room.publish_on_sale(get_waiting_room_client(), event_id, updated_event.on_sale_at)
     redis_client = get_redis_client()
-    await redis_client.delete(f"event:{event_id}")
-    keys_to_delete = await redis_client.keys("events:all:*")
-    if keys_to_delete:
-        await redis_client.delete(*keys_to_delete)
+    await availability.publish_event_state(redis_client, updated_event)
+    await event_cache.invalidate(
+        redis_client,
+        event_id,
+        lists=listed_as != (updated_event.name, updated_event.venue, updated_event.event_time),
+    )
+
+    return updated_event
+
+@router.put("/events/{event_id}/seat-shards", response_model=schemas.Event)
+async def configure_event_seat_shards(
+    event_id: int,
+    config: schemas.SeatShardConfig,
+    db: AsyncSession = Depends(get_db),
+    admin_user: models.User = Depends(get_current_admin_user),
+):
+    """
+    Split an event's inventory across `shard_count` counter rows so bookings for a very
+    hot event do not all serialize on one row. Use 0 to switch back to a single counter.
+    Only accessible by admin users.
+    """
+    result = await db.execute(
+        select(models.Event).filter(models.Event.id == event_id).with_for_update()
+    )
+    event_to_shard = result.scalars().first()
+    if not event_to_shard:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    updated_event = await seat_shard_crud.configure_seat_shards(
+        db=db, event=event_to_shard, shard_count=config.shard_count
+    )
+
+    await event_cache.invalidate(get_redis_client(), event_id)
 
     return updated_event
 
@@ -125,13 +265,76 @@ async def cancel_an_event(
     
     if not event_to_cancel:
         raise HTTPException(status_code=404, detail="Event not found")
-        
+
+    confirmed = [
+        booking for booking in event_to_cancel.bookings
+        if booking.status == models.BookingStatus.CONFIRMED
+    ]
     cancelled_event = await event_crud.cancel_event(db=db, event_to_cancel=event_to_cancel)
 
     redis_client = get_redis_client()
-    await redis_client.delete(f"event:{event_id}")
-    keys_to_delete = await redis_client.keys("events:all:*")
-    if keys_to_delete:
-        await redis_client.delete(*keys_to_delete)
+    await availability.publish_event_state(redis_client, cancelled_event)
+    await booking_cache.record(redis_client, confirmed)
+    await waitlist_index.drop(redis_client, event_id)
+    await event_cache.invalidate(redis_client, event_id, lists=True)
+
+    return cancelled_event
+
+@router.post("/events/{event_id}/queue", response_model=schemas.QueuePosition)
+async def join_waiting_room(
+    event_id: int,
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Join the waiting room for a scheduled on-sale and get a queue token.
+    Pass the token as `queue_token` when booking once admitted.
+    """
+    queue_position = await waiting_room.join(get_waiting_room_client(), event_id, current_user.id)
+    if queue_position is None:
+        raise HTTPException(status_code=404, detail="This event has no active waiting room")
+    return queue_position
 
-    return cancelled_event
\ No newline at end of file
+@router.get("/events/{event_id}/queue-position", response_model=schemas.QueuePosition)
+async def read_queue_position(event_id: int, token: str):
+    """
+    Current place in the waiting room for a queue token. Served entirely from Redis.
+    """
+    queue_position = await waiting_room.position(get_waiting_room_client(), event_id, token)
+    if queue_position is None:
+        raise HTTPException(status_code=404, detail="Unknown queue token")
+    return queue_position
+
+@router.get("/availability/stream")
+async def stream_availability(
+    event_ids: str = Query(..., description="Comma-separated event ids"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Live seat availability for up to AVAILABILITY_MAX_EVENTS_PER_STREAM events as
+    Server-Sent Events: one snapshot per event, then an update whenever seats change.
+    Replaces polling the event endpoints during an on-sale.
+    """
+    try:
+        ids = sorted({int(i) for i in event_ids.split(",") if i.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="event_ids must be comma-separated integers")
+    if not ids:
+        raise HTTPException(status_code=400, detail="No event ids given")
+    if len(ids) > availability.AVAILABILITY_MAX_EVENTS_PER_STREAM:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {availability.AVAILABILITY_MAX_EVENTS_PER_STREAM} events per stream",
+        )
+
+    events = await event_crud.get_events_by_ids(db, ids)
+    if not events:
+        raise HTTPException(status_code=404, detail="Event not found")
+    initial = {event.id: availability.snapshot(event) for event in events}
+    # Release the connection before streaming; the stream itself never touches the database.
+    await db.close()
+
+    return StreamingResponse(
+        availability.stream(availability.get_hub(get_redis_pubsub_client()), initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
+from app.schemas import schemas
+from app.models import models
+from app.crud import hold as hold_crud
+from app.api.dependencies import get_current_user
+from app.core.query_counter import query_budget
+from app.core.redis_client import get_redis_client, get_waiting_room_client
+from app.services import waiting_room, availability, booking_cache, waitlist_index
+
+router = APIRouter(tags=["Holds"])
+
+
+@router.post("/events/{event_id}/holds", response_model=schemas.SeatHold, status_code=status.HTTP_201_CREATED)
+@query_budget(7)
+async def hold_seats(
+    event_id: int,
+    hold: schemas.SeatHoldCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Hold seats for a few minutes while the user checks out.
+    Held seats count against availability until confirmed, released or expired.
+    """
+    await waiting_room.check_admission(get_waiting_room_client(), event_id, current_user.id, hold.queue_token)
+    db_hold = await hold_crud.create_hold(
+        db, event_id=event_id, user_id=current_user.id, tickets=hold.tickets
+    )
+
+    redis_client = get_redis_client()
+    if db_hold.seat_shard is None:
+        await availability.publish_event_state(redis_client, db_hold.event)
+    else:
+        await availability.publish_seat_change(redis_client, event_id, delta=db_hold.tickets)
+    return db_hold
+
+
+@router.post("/holds/{hold_id}/confirm", response_model=schemas.Booking)
+@query_budget(4)
+async def confirm_hold(
+    hold_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Confirm an active hold, turning it into a booking.
+    """
+    db_booking = await hold_crud.confirm_hold(db, hold_id=hold_id, user_id=current_user.id)
+    await booking_cache.record(get_redis_client(), [db_booking])
+    return db_booking
+
+
+@router.post("/holds/{hold_id}/release", response_model=schemas.SeatHold)
+async def release_hold(
+    hold_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Release an active hold, returning its seats to the event.
+    """
+    released_hold, promoted = await hold_crud.release_hold(db, hold_id=hold_id, user_id=current_user.id)
+    redis_client = get_redis_client()
+    await availability.publish_event_state(redis_client, released_hold.event)
+    await booking_cache.record(redis_client, promoted)
+    await waitlist_index.remove(redis_client, promoted)
+    return released_hold
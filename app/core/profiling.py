@@ -0,0 +1,169 @@
+import time
+import uuid
+import logging
+from contextvars import ContextVar
+from typing import List, Optional
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_bytes_client
+from app.db.session import AsyncSessionLocal
+from app.api.dependencies import get_current_user, get_current_admin_user
+
+logger = logging.getLogger(__name__)
+
+PROFILE_INTERVAL_SECONDS = settings.PROFILE_INTERVAL_SECONDS
+PROFILE_TTL_SECONDS = settings.PROFILE_TTL_SECONDS
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_FLAG = b"&profile=1&"
+
+
+def profile_key(profile_id: str) -> str:
+    return f"profile:{profile_id}"
+
+
+# --- SQL timings ---
+# The listeners are attached only while at least one profiled request is running, and
+# only record statements executed in a profiled request's context.
+
+_statements: ContextVar[Optional[List[dict]]] = ContextVar("profiled_statements", default=None)
+_statements_started: ContextVar[float] = ContextVar("profiled_statements_started", default=0.0)
+_profiled_requests = 0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _statements.get() is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    statements = _statements.get()
+    started = getattr(context, "_profile_started", None)
+    if statements is None or started is None:
+        return
+    statements.append({
+        "sql": statement,
+        "executemany": executemany,
+        "started_ms": round((started - _statements_started.get()) * 1000, 3),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+    })
+
+
+def _listen(engine):
+    global _profiled_requests
+    if _profiled_requests == 0:
+        event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    _profiled_requests += 1
+
+
+def _unlisten(engine):
+    global _profiled_requests
+    _profiled_requests -= 1
+    if _profiled_requests == 0:
+        event.remove(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Middleware ---
+
+def _requested(scope) -> bool:
+    if PROFILE_QUERY_FLAG in b"&" + scope.get("query_string", b"") + b"&":
+        return True
+    return any(name == PROFILE_HEADER for name, _ in scope["headers"])
+
+
+async def _is_admin(scope) -> bool:
+    """
+    The same check as the admin endpoints, run for flagged requests only.
+    """
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    async with AsyncSessionLocal() as db:
+        try:
+            await get_current_admin_user(await get_current_user(token=token, db=db))
+        except HTTPException:
+            return False
+    return True
+
+
+class ProfilingMiddleware:
+    """
+    Runs a request under a sampling profiler when an admin sends `X-Profile: 1` or
+    `?profile=1`. The speedscope profile and the SQL statements with their timings are
+    stored in Redis for PROFILE_TTL_SECONDS, and the response names them in `X-Profile`.
+    Unflagged requests only pay for the flag check: no profiler, imports or listeners.
+    A flag from a non-admin is ignored.
+    """
+
+    def __init__(self, app, engine):
+        self.app = app
+        self.engine = engine
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _requested(scope) or not await _is_admin(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Imported on first use, so unprofiled processes never load the profiler.
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        profile_id = uuid.uuid4().hex
+        location = f"/admin/profiles/{profile_id}".encode()
+        status = []
+
+        async def send_with_location(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile", location)]}
+            await send(message)
+
+        statements = []
+        statements_token = _statements.set(statements)
+        started_token = _statements_started.set(time.perf_counter())
+        profiler = Profiler(interval=PROFILE_INTERVAL_SECONDS, async_mode="enabled")
+        _listen(self.engine)
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_location)
+        finally:
+            profiler.stop()
+            duration = time.perf_counter() - started
+            _unlisten(self.engine)
+            _statements.reset(statements_token)
+            _statements_started.reset(started_token)
+
+        summary = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status[0] if status else None,
+            "duration_ms": round(duration * 1000, 3),
+            "sql_count": len(statements),
+            "sql_duration_ms": round(sum(s["duration_ms"] for s in statements), 3),
+            "statements": statements,
+        }
+        try:
+            async with get_redis_bytes_client().pipeline(transaction=False) as pipe:
+                pipe.hset(profile_key(profile_id), mapping={
+                    "speedscope": profiler.output(renderer=SpeedscopeRenderer()),
+                    "sql": orjson.dumps(summary),
+                })
+                pipe.expire(profile_key(profile_id), PROFILE_TTL_SECONDS)
+                await pipe.execute()
+        except Exception:
+            logger.exception(f"Could not store profile {profile_id}.")
+
+
+def install(app, engine):
+    """
+    Add after other middleware, so the admin check's own query is not counted against
+    the profiled endpoint.
+    """
+    app.add_middleware(ProfilingMiddleware, engine=engine)
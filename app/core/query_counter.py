@@ -0,0 +1,126 @@
+import time
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import Request
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_DEBUG = settings.QUERY_DEBUG
+QUERY_BUDGET_STRICT = settings.QUERY_BUDGET_STRICT
+# The same statement this many times in one request is reported as a likely N+1.
+N_PLUS_ONE_THRESHOLD = settings.N_PLUS_ONE_THRESHOLD
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    """
+    SQL statements executed and total time spent in the database for one unit of work.
+    Statements are also counted in the enclosing unit of work, if any.
+    """
+
+    def __init__(self, parent: "QueryStats | None" = None):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    while stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+        stats.statements[statement] += 1
+        stats = stats.parent
+
+
+def instrument_engine(engine):
+    """
+    Registers the statement counting hooks. Only called in debug/test mode, so production
+    engines carry no listeners at all.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries():
+    """
+    Counts the statements executed inside the block, e.g. to check a budget in a test.
+    Blocks nest, so a test wrapping a request also sees what the middleware counted.
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def query_budget(max_queries: int):
+    """
+    Declares the maximum number of SQL statements an endpoint may execute per request.
+    The HTTP middleware enforces it on endpoints; on worker-side functions, which never
+    pass through the middleware, the test suite and the benchmarks check it.
+    """
+    def decorator(endpoint):
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorator
+
+
+def check_budget(stats: QueryStats, budget: int | None, label: str):
+    for sql, n in stats.repeated().items():
+        logger.warning(f"Possible N+1 in {label}: statement executed {n} times: {sql[:200]}")
+
+    if budget is not None and stats.count > budget:
+        message = f"{label} executed {stats.count} SQL statements, budget is {budget}"
+        if QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+async def server_timing_middleware(request: Request, call_next):
+    """
+    Adds a Server-Timing header with the statement count and database time of the request,
+    and enforces the endpoint's declared query budget.
+    """
+    with count_queries() as stats:
+        response = await call_next(request)
+
+    response.headers["Server-Timing"] = f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+
+    endpoint = request.scope.get("endpoint")
+    route = request.scope.get("route")
+    label = f"{request.method} {getattr(route, 'path', request.url.path)}"
+    check_budget(stats, getattr(endpoint, "query_budget", None), label)
+    return response
+
+
+def install(app, engine):
+    if not QUERY_DEBUG:
+        return
+    instrument_engine(engine)
+    app.middleware("http")(server_timing_middleware)
@@ -1,15 +1,85 @@
-import os
+import asyncio
 import redis.asyncio as redis
-from dotenv import load_dotenv
 
-load_dotenv()
+from app.core.config import settings
+from app.core.resilience import CircuitBreaker
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+# The cache role: response caches, booking histories and availability pub/sub.
+REDIS_URL = settings.CACHE_REDIS_URL
+# Waiting rooms: state that an evicting cache must not lose.
+WAITING_ROOM_REDIS_URL = settings.WAITING_ROOM_REDIS_URL
 
-redis_pool = redis.ConnectionPool.from_url(REDIS_URL, decode_responses=True)
+timeouts = {
+    "socket_timeout": settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+}
+# Pools connect lazily; the API warms them in its lifespan and closes them at shutdown.
+redis_pool = redis.ConnectionPool.from_url(
+    REDIS_URL, decode_responses=True, max_connections=settings.REDIS_MAX_CONNECTIONS, **timeouts
+)
+# Raw bytes, for cached (possibly compressed) response bodies.
+redis_bytes_pool = redis.ConnectionPool.from_url(
+    REDIS_URL, max_connections=settings.REDIS_MAX_CONNECTIONS, **timeouts
+)
+waiting_room_pool = redis.ConnectionPool.from_url(
+    WAITING_ROOM_REDIS_URL, decode_responses=True, max_connections=settings.REDIS_MAX_CONNECTIONS, **timeouts
+)
+# Subscriptions block on reads for as long as nothing is published.
+redis_pubsub_pool = redis.ConnectionPool.from_url(
+    REDIS_URL, decode_responses=True, socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS
+)
+
+# Shared by every cache user in the process; see CircuitBreaker.guard().
+cache_breaker = CircuitBreaker("Cache Redis", errors=(redis.RedisError, OSError))
+waiting_room_breaker = CircuitBreaker("Waiting room Redis", errors=(redis.RedisError, OSError))
+
+_clients = {}
+
+def _client(name: str, pool: redis.ConnectionPool) -> redis.Redis:
+    client = _clients.get(name)
+    if client is None or client.connection_pool is not pool:
+        client = _clients[name] = redis.Redis(connection_pool=pool)
+    return client
 
 def get_redis_client() -> redis.Redis:
     """
-    Returns a Redis client from the connection pool.
+    Returns the process-wide Redis client for the connection pool.
+    """
+    return _client("default", redis_pool)
+
+def get_redis_bytes_client() -> redis.Redis:
+    """
+    Returns the process-wide Redis client that does not decode responses.
+    """
+    return _client("bytes", redis_bytes_pool)
+
+def get_waiting_room_client() -> redis.Redis:
+    """
+    Returns the process-wide Redis client for waiting room state.
+    """
+    return _client("waiting_room", waiting_room_pool)
+
+def get_redis_pubsub_client() -> redis.Redis:
+    """
+    Returns the process-wide Redis client for subscriptions, which has no read timeout.
+    """
+    return _client("pubsub", redis_pubsub_pool)
+
+async def warm_pools(connections: int = settings.REDIS_POOL_WARM):
+    """
+    Opens `connections` connections in each pool with concurrent PINGs.
+    """
+    for client in (get_redis_client(), get_redis_bytes_client(), get_waiting_room_client()):
+        await asyncio.gather(*(client.ping() for _ in range(connections)))
+
+async def close_pools():
+    for pool in (redis_pool, redis_bytes_pool, waiting_room_pool, redis_pubsub_pool):
+        await pool.disconnect()
+    _clients.clear()
+
+def new_redis_client() -> redis.Redis:
+    """
+    Returns a client with its own connection pool, for code that runs its own event
+    loop (e.g. Celery tasks using asyncio.run). Close it with `aclose()` when done.
     """
-    return redis.Redis(connection_pool=redis_pool)
+    return redis.Redis.from_url(REDIS_URL, decode_responses=True)
@@ -0,0 +1,135 @@
+import time
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Hashable, Optional, Tuple, Type
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_BREAKER_FAILURES = settings.CIRCUIT_BREAKER_FAILURES
+CIRCUIT_BREAKER_RESET_SECONDS = settings.CIRCUIT_BREAKER_RESET_SECONDS
+
+
+class BackendUnavailable(Exception):
+    """
+    A backend failed or its circuit breaker is open. The API answers 503 with Retry-After.
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, so callers skip the backend
+    instead of waiting on it. After `reset_seconds` a single call is let through; its
+    outcome closes the breaker or keeps it open for another period. Per process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        errors: Tuple[Type[BaseException], ...],
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURES,
+        reset_seconds: float = CIRCUIT_BREAKER_RESET_SECONDS,
+    ):
+        self.name = name
+        self.errors = errors
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 1.0
+        return max(self.reset_seconds - (time.monotonic() - self.opened_at), 1.0)
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if not self._probing and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self._probing = True
+            return True
+        return False
+
+    def success(self):
+        if self.opened_at is not None:
+            logger.info(f"{self.name} circuit breaker closed.")
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"{self.name} circuit breaker opened after {self.failures} failures.")
+            self.opened_at = time.monotonic()
+
+    @contextmanager
+    def guard(self):
+        """
+        Runs the block against the backend, or raises BackendUnavailable straight away
+        while the breaker is open. Backend errors in the block count as failures and are
+        re-raised as BackendUnavailable; anything else means the backend answered.
+        """
+        if not self.allow():
+            raise BackendUnavailable(self.name, self.retry_after())
+        failed = False
+        try:
+            yield
+        except self.errors as exc:
+            failed = True
+            self.failure()
+            raise BackendUnavailable(self.name, self.retry_after()) from exc
+        finally:
+            if not failed:
+                self.success()
+
+
+class LocalCache:
+    """
+    A small in-process LRU with a fixed time to live, used as a fallback while Redis is
+    unavailable. It is not shared or invalidated across processes, so entries are only
+    read when Redis cannot be.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, *keys: Hashable):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
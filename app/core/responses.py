@@ -0,0 +1,39 @@
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def dump_json(response_type: Any, value: Any) -> bytes:
+    """
+    Validates `value` (ORM objects or already validated models) as `response_type` once
+    and renders it to JSON bytes with orjson. Datetimes and enums are left to orjson, and
+    UTC datetimes end in "Z" as pydantic renders them.
+    """
+    adapter = _adapter(response_type)
+    content = adapter.dump_python(adapter.validate_python(value, from_attributes=True))
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+class RawJSONResponse(Response):
+    """
+    A response for content that is already JSON, e.g. a cached payload.
+    """
+    media_type = "application/json"
+
+
+def model_response(response_type: Any, value: Any, status_code: int = 200) -> Response:
+    """
+    Renders `value` as `response_type` and returns it as a ready response. FastAPI does not
+    re-validate or re-encode returned Response objects, so handlers on hot paths skip the
+    second pass `response_model` would otherwise do. Keep `response_model` on the route
+    for the OpenAPI schema.
+    """
+    return RawJSONResponse(content=dump_json(response_type, value), status_code=status_code)
@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, cast, Float, Date
+from sqlalchemy import func, cast, Float, Date, union_all
 
 from app.models import models
 from app.schemas import schemas
@@ -8,10 +8,17 @@ from app.schemas import schemas
 async def get_analytics_overview(db: AsyncSession) -> schemas.AnalyticsOverview:
     """
     Performs aggregation queries to generate an enhanced analytics overview.
+    Bookings of archived events are counted from their rollups (EventBookingStats and
+    BookingDailyStats), so only the hot bookings table is ever scanned.
     """
+    Stats = models.EventBookingStats
     total_bookings_result = await db.execute(
-        select(func.count(models.Booking.id))
-        .filter(models.Booking.status == models.BookingStatus.CONFIRMED)
+        select(
+            select(func.count(models.Booking.id))
+            .filter(models.Booking.status == models.BookingStatus.CONFIRMED)
+            .scalar_subquery()
+            + select(func.coalesce(func.sum(Stats.confirmed_bookings), 0)).scalar_subquery()
+        )
     )
     total_confirmed_bookings = total_bookings_result.scalar_one_or_none() or 0
 
@@ -25,36 +32,52 @@ async def get_analytics_overview(db: AsyncSession) -> schemas.AnalyticsOverview:
     total_capacity = total_capacity_result.scalar_one_or_none() or 1
     capacity_utilization_percentage = round((total_booked_seats / total_capacity) * 100, 2) if total_capacity > 0 else 0
 
+    confirmed_per_event = union_all(
+        select(models.Booking.event_id, func.count(models.Booking.id).label("booking_count"))
+        .filter(models.Booking.status == models.BookingStatus.CONFIRMED)
+        .group_by(models.Booking.event_id),
+        select(Stats.event_id, Stats.confirmed_bookings.label("booking_count")),
+    ).subquery()
+    booking_count = func.sum(confirmed_per_event.c.booking_count)
     popular_events_result = await db.execute(
         select(
             models.Event.id.label("event_id"),
             models.Event.name.label("event_name"),
-            func.count(models.Booking.id).label("booking_count"),
+            booking_count.label("booking_count"),
         )
-        .join(models.Booking, models.Event.id == models.Booking.event_id)
-        .filter(models.Booking.status == models.BookingStatus.CONFIRMED)
+        .join(confirmed_per_event, models.Event.id == confirmed_per_event.c.event_id)
         .group_by(models.Event.id, models.Event.name)
-        .order_by(func.count(models.Booking.id).desc())
+        .having(booking_count > 0)
+        .order_by(booking_count.desc())
         .limit(5)
     )
     most_popular_events = popular_events_result.all()
     
 
     total_cancelled_result = await db.execute(
-        select(func.count(models.Booking.id))
-        .filter(models.Booking.status == models.BookingStatus.CANCELLED)
+        select(
+            select(func.count(models.Booking.id))
+            .filter(models.Booking.status == models.BookingStatus.CANCELLED)
+            .scalar_subquery()
+            + select(func.coalesce(func.sum(Stats.cancelled_bookings), 0)).scalar_subquery()
+        )
     )
     total_cancelled_bookings = total_cancelled_result.scalar_one_or_none() or 0
     total_created_bookings = total_confirmed_bookings + total_cancelled_bookings
     cancellation_rate_percentage = round((total_cancelled_bookings / total_created_bookings) * 100, 2) if total_created_bookings > 0 else 0
 
-    daily_stats_result = await db.execute(
+    per_day = union_all(
         select(
             cast(models.Booking.booked_at, Date).label("date"),
             func.count(models.Booking.id).label("booking_count")
         )
-        .group_by(cast(models.Booking.booked_at, Date))
-        .order_by(cast(models.Booking.booked_at, Date).asc())
+        .group_by(cast(models.Booking.booked_at, Date)),
+        select(models.BookingDailyStats.date, models.BookingDailyStats.booking_count),
+    ).subquery()
+    daily_stats_result = await db.execute(
+        select(per_day.c.date, func.sum(per_day.c.booking_count).label("booking_count"))
+        .group_by(per_day.c.date)
+        .order_by(per_day.c.date.asc())
     )
     daily_booking_stats = [
         {"date": str(row.date), "booking_count": row.booking_count} 
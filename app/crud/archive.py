@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import insert, delete, update, func, cast, Date, text
+
+from app.core.config import settings
+from app.models import models
+
+ARCHIVE_AFTER_DAYS = settings.ARCHIVE_AFTER_DAYS
+ARCHIVE_BATCH_EVENTS = settings.ARCHIVE_BATCH_EVENTS
+
+Booking = models.Booking
+Waitlist = models.WaitlistEntry
+
+
+def _month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+async def _ensure_partition(db: AsyncSession, table: str, month: datetime):
+    """
+    Creates the month's partition of an archive table if it does not exist yet.
+    Partition bounds cannot be bound parameters, but they are formatted from datetimes.
+    """
+    await db.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {table}_{month:%Y_%m} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+    ))
+
+
+async def _roll_up_bookings(db: AsyncSession, event_ids: list):
+    """
+    Adds the bookings of events about to be archived to the per-event and per-day totals
+    analytics reads, so the archived rows never have to be scanned again.
+    """
+    confirmed = Booking.status == models.BookingStatus.CONFIRMED
+    cancelled = Booking.status == models.BookingStatus.CANCELLED
+    per_event = pg_insert(models.EventBookingStats).from_select(
+        ["event_id", "confirmed_bookings", "cancelled_bookings", "tickets_booked"],
+        select(
+            Booking.event_id,
+            func.count().filter(confirmed),
+            func.count().filter(cancelled),
+            func.coalesce(func.sum(Booking.tickets_booked).filter(confirmed), 0),
+        )
+        .where(Booking.event_id.in_(event_ids))
+        .group_by(Booking.event_id),
+    )
+    Stats = models.EventBookingStats
+    await db.execute(per_event.on_conflict_do_update(
+        index_elements=[Stats.event_id],
+        set_={
+            "confirmed_bookings": Stats.confirmed_bookings + per_event.excluded.confirmed_bookings,
+            "cancelled_bookings": Stats.cancelled_bookings + per_event.excluded.cancelled_bookings,
+            "tickets_booked": Stats.tickets_booked + per_event.excluded.tickets_booked,
+        },
+    ))
+
+    booked_on = cast(Booking.booked_at, Date)
+    per_day = pg_insert(models.BookingDailyStats).from_select(
+        ["date", "booking_count"],
+        select(booked_on, func.count())
+        .where(Booking.event_id.in_(event_ids))
+        .group_by(booked_on),
+    )
+    Daily = models.BookingDailyStats
+    await db.execute(per_day.on_conflict_do_update(
+        index_elements=[Daily.date],
+        set_={"booking_count": Daily.booking_count + per_day.excluded.booking_count},
+    ))
+
+
+async def archive_past_events(db: AsyncSession) -> Tuple[int, int, int]:
+    """
+    Moves the bookings and waitlist entries of up to ARCHIVE_BATCH_EVENTS events that
+    ended more than ARCHIVE_AFTER_DAYS ago into the partitioned archive tables, rolling
+    the bookings up for analytics first. One transaction per batch; the events are
+    locked (skipping any that are busy) and marked archived.
+    Returns the number of events, bookings and waitlist entries archived.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=ARCHIVE_AFTER_DAYS)
+    result = await db.execute(
+        select(models.Event.id, models.Event.event_time)
+        .where(models.Event.event_time < cutoff, models.Event.archived_at.is_(None))
+        .order_by(models.Event.event_time)
+        .limit(ARCHIVE_BATCH_EVENTS)
+        .with_for_update(skip_locked=True)
+    )
+    events = result.all()
+    if not events:
+        await db.commit()
+        return 0, 0, 0
+    event_ids = [event.id for event in events]
+
+    for month in sorted({_month_start(event.event_time) for event in events}):
+        for table in (models.BookingArchive.__tablename__, models.WaitlistEntryArchive.__tablename__):
+            await _ensure_partition(db, table, month)
+
+    await _roll_up_bookings(db, event_ids)
+
+    await db.execute(
+        insert(models.BookingArchive).from_select(
+            ["id", "event_time", "user_id", "event_id", "tickets_booked", "status", "booked_at", "seat_shard"],
+            select(
+                Booking.id, models.Event.event_time, Booking.user_id, Booking.event_id,
+                Booking.tickets_booked, Booking.status, Booking.booked_at, Booking.seat_shard,
+            )
+            .join(models.Event, models.Event.id == Booking.event_id)
+            .where(Booking.event_id.in_(event_ids)),
+        )
+    )
+    bookings = await db.execute(
+        delete(Booking)
+        .where(Booking.event_id.in_(event_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+    await db.execute(
+        insert(models.WaitlistEntryArchive).from_select(
+            ["id", "event_time", "user_id", "event_id", "tickets_requested", "status", "created_at"],
+            select(
+                Waitlist.id, models.Event.event_time, Waitlist.user_id, Waitlist.event_id,
+                Waitlist.tickets_requested, Waitlist.status, Waitlist.created_at,
+            )
+            .join(models.Event, models.Event.id == Waitlist.event_id)
+            .where(Waitlist.event_id.in_(event_ids)),
+        )
+    )
+    waitlist = await db.execute(
+        delete(Waitlist)
+        .where(Waitlist.event_id.in_(event_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+    await db.execute(
+        update(models.Event)
+        .where(models.Event.id.in_(event_ids))
+        .values(archived_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return len(event_ids), bookings.rowcount, waitlist.rowcount
@@ -1,22 +1,137 @@
+import time
+from collections import defaultdict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert, update, union_all
 from fastapi import HTTPException, status
 from app.models import models
 from app.schemas import schemas
-from typing import List, Union
-from sqlalchemy.orm import selectinload
+from typing import List, Union, Tuple
+from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from app.crud import waitlist as waitlist_crud
+from app.crud import seat_shard as seat_shard_crud
+from app.core.query_counter import query_budget
 
-async def create_booking(
-    db: AsyncSession, booking: schemas.BookingCreate, user_id: int
-) -> Union[models.Booking, models.WaitlistEntry]:
+# Events known to use sharded inventory in this process, event_id -> shard_count.
+# Lets create_booking go straight to the shards; a stale entry just falls through
+# to the slow path, which corrects it.
+_sharded_events = {}
+
+
+async def insert_booking(
+    db: AsyncSession, *, event_id: int, user_id: int, tickets: int, seat_shard: int | None = None
+) -> models.Booking:
     """
-    Creates a booking for a user. If the event is full, adds the user to the waitlist.
-    Returns either the new Booking object or the new WaitlistEntry object.
+    Inserts a confirmed booking with INSERT ... RETURNING, so it is fully populated
+    without a reload. Does not touch booked_seats.
+    """
+    return (
+        await db.scalars(
+            insert(models.Booking).returning(models.Booking),
+            [{"user_id": user_id, "event_id": event_id, "tickets_booked": tickets, "seat_shard": seat_shard}],
+        )
+    ).one()
+
+
+async def book_seats(
+    db: AsyncSession, *, event: models.Event, user_id: int, tickets: int
+) -> models.Booking | None:
+    """
+    Claims seats on a locked event and inserts a confirmed booking, without committing.
+    For sharded events the seats come from a shard; returns None if no shard has room.
+    """
+    seat_shard = None
+    if event.shard_count:
+        seat_shard = await seat_shard_crud.claim_seats(
+            db, event_id=event.id, tickets=tickets, shard_count=event.shard_count
+        )
+        if seat_shard is None:
+            seat_shard = await seat_shard_crud.rebalance_and_claim(db, event=event, tickets=tickets)
+        if seat_shard is None:
+            return None
+    else:
+        await adjust_booked_seats(db, event=event, delta=tickets)
+
+    db_booking = await insert_booking(
+        db, event_id=event.id, user_id=user_id, tickets=tickets, seat_shard=seat_shard
+    )
+    set_committed_value(db_booking, "event", event)
+    return db_booking
+
+
+async def adjust_booked_seats(db: AsyncSession, *, event: models.Event, delta: int):
+    """
+    Applies a seat delta to a locked event and syncs the in-memory object from RETURNING.
+    """
+    result = await db.execute(
+        update(models.Event)
+        .where(models.Event.id == event.id)
+        .values(booked_seats=models.Event.booked_seats + delta)
+        .returning(models.Event.booked_seats, models.Event.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.one()
+    set_committed_value(event, "booked_seats", row.booked_seats)
+    set_committed_value(event, "updated_at", row.updated_at)
+
+
+async def reserve_seats(db: AsyncSession, *, event_id: int, tickets: int) -> models.Event | None:
+    """
+    Atomically claims seats on an unsharded event with a single conditional UPDATE ... RETURNING.
+    Returns the updated event, or None if the event is missing, not active, sharded or too full.
+    The row lock is held only for this one statement's duration until commit, instead of
+    a separate SELECT ... FOR UPDATE round trip.
     """
+    result = await db.scalars(
+        update(models.Event)
+        .where(
+            models.Event.id == event_id,
+            models.Event.status == models.EventStatus.ACTIVE,
+            models.Event.shard_count == 0,
+            models.Event.capacity - models.Event.booked_seats >= tickets,
+        )
+        .values(booked_seats=models.Event.booked_seats + tickets)
+        .returning(models.Event)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    return result.first()
+
+
+async def take_seats(
+    db: AsyncSession, *, event_id: int, tickets: int
+) -> Tuple[models.Event | None, int | None, bool]:
+    """
+    Claims `tickets` seats on an event without committing.
+    Returns (event, seat_shard, taken). The event is None when a sharded fast path claim
+    succeeded without loading it. When `taken` is False the event row is left locked, so
+    the caller can waitlist the request before a cancellation frees seats.
+    Raises 404/400 for missing or cancelled events.
+    """
+    # Imported here so the API does not load prometheus_client and Celery at startup.
+    from app.workers import metrics
+
+    shard_count = _sharded_events.get(event_id)
+
+    claim_started = time.perf_counter()
+    if shard_count:
+        seat_shard = await seat_shard_crud.claim_seats(
+            db, event_id=event_id, tickets=tickets, shard_count=shard_count
+        )
+        event = None
+    else:
+        event = await reserve_seats(db, event_id=event_id, tickets=tickets)
+        seat_shard = None
+    metrics.SEAT_CLAIM_TIME.observe(time.perf_counter() - claim_started)
+
+    if event is not None or seat_shard is not None:
+        return event, seat_shard, True
+
+    # Slow path: find out why the reservation failed. Lock the row so a concurrent
+    # cancellation cannot free seats between this check and the caller's next step.
     result = await db.execute(
         select(models.Event)
-        .filter(models.Event.id == booking.event_id)
+        .filter(models.Event.id == event_id)
         .with_for_update()
     )
     event = result.scalars().first()
@@ -26,8 +141,47 @@ async def create_booking(
     if event.status == models.EventStatus.CANCELLED:
         raise HTTPException(status_code=400, detail="Cannot book tickets for a cancelled event.")
 
-    available_seats = event.capacity - event.booked_seats
-    if available_seats < booking.tickets_booked:
+    if event.shard_count:
+        _sharded_events[event.id] = event.shard_count
+        seat_shard = await seat_shard_crud.rebalance_and_claim(db, event=event, tickets=tickets)
+        return event, seat_shard, seat_shard is not None
+
+    _sharded_events.pop(event.id, None)
+    if event.capacity - event.booked_seats >= tickets:
+        await adjust_booked_seats(db, event=event, delta=tickets)
+        return event, None, True
+    return event, None, False
+
+
+async def return_seats(
+    db: AsyncSession, *, event: models.Event, tickets: int, seat_shard: int | None
+):
+    """
+    Gives seats back to a locked event, or to the shard they came from if it is sharded.
+    """
+    if event.shard_count:
+        await seat_shard_crud.release_seats(
+            db, event_id=event.id, shard_no=seat_shard, tickets=tickets
+        )
+    else:
+        await adjust_booked_seats(db, event=event, delta=-tickets)
+
+
+# Worst case is a sharded event whose shards are fragmented or full.
+@query_budget(6)
+async def create_booking(
+    db: AsyncSession, booking: schemas.BookingCreate, user_id: int
+) -> Union[models.Booking, models.WaitlistEntry]:
+    """
+    Creates a booking for a user. If the event is full, adds the user to the waitlist.
+    Returns either the new Booking object or the new WaitlistEntry object.
+    Bookings on sharded events may be returned without their event loaded.
+    """
+    event, seat_shard, taken = await take_seats(
+        db, event_id=booking.event_id, tickets=booking.tickets_booked
+    )
+
+    if not taken:
         waitlist_entry = await waitlist_crud.add_to_waitlist(
             db=db,
             event_id=booking.event_id,
@@ -36,24 +190,101 @@ async def create_booking(
         )
         return waitlist_entry
 
-    db_booking = models.Booking(
-        user_id=user_id,
+    db_booking = await insert_booking(
+        db,
         event_id=booking.event_id,
-        tickets_booked=booking.tickets_booked,
+        user_id=user_id,
+        tickets=booking.tickets_booked,
+        seat_shard=seat_shard,
     )
-    db.add(db_booking)
-    event.booked_seats += booking.tickets_booked
-    
+    if event is not None:
+        set_committed_value(db_booking, "event", event)
     await db.commit()
+    return db_booking
+
+async def create_cart_booking(
+    db: AsyncSession, cart: schemas.CartBookingCreate, user_id: int
+) -> List[Tuple[int, Union[models.Booking, models.WaitlistEntry, None]]]:
+    """
+    Books every line of a cart in one transaction. All events are locked with a single
+    SELECT ... FOR UPDATE in id order, so carts that share events cannot deadlock.
+    In all_or_nothing mode any line that cannot be booked in full rolls back the whole
+    cart (404/400/409). In best_effort mode full events are waitlisted and missing or
+    cancelled events are skipped. Returns (event_id, Booking | WaitlistEntry | None)
+    pairs in event id order.
+    """
+    all_or_nothing = cart.mode == "all_or_nothing"
+    tickets_by_event = defaultdict(int)
+    for line in cart.lines:
+        tickets_by_event[line.event_id] += line.tickets_booked
+    event_ids = sorted(tickets_by_event)
 
     result = await db.execute(
-        select(models.Booking)
-        .options(selectinload(models.Booking.event))
-        .filter(models.Booking.id == db_booking.id)
+        select(models.Event)
+        .filter(models.Event.id.in_(event_ids))
+        .order_by(models.Event.id)
+        .with_for_update()
     )
-    
-    final_booking = result.scalars().first()
-    return final_booking
+    events = {event.id: event for event in result.scalars().all()}
+
+    async def reject(status_code: int, detail: str):
+        await db.rollback()
+        raise HTTPException(status_code=status_code, detail=detail)
+
+    outcomes = {event_id: None for event_id in event_ids}
+    unsharded, to_waitlist = [], {}
+    for event_id in event_ids:
+        event, tickets = events.get(event_id), tickets_by_event[event_id]
+        if event is None:
+            if all_or_nothing:
+                await reject(404, f"Event {event_id} not found")
+            continue
+        if event.status == models.EventStatus.CANCELLED:
+            if all_or_nothing:
+                await reject(400, f"Cannot book tickets for cancelled event {event_id}.")
+            continue
+
+        if event.shard_count:
+            _sharded_events[event.id] = event.shard_count
+            outcomes[event_id] = await book_seats(db, event=event, user_id=user_id, tickets=tickets)
+            has_room = outcomes[event_id] is not None
+        else:
+            has_room = event.capacity - event.booked_seats >= tickets
+            if has_room:
+                unsharded.append((event, tickets))
+
+        if not has_room:
+            if all_or_nothing:
+                await reject(status.HTTP_409_CONFLICT, f"Not enough seats available for event {event_id}.")
+            to_waitlist[event_id] = tickets
+
+    if unsharded:
+        # The rows are locked, so absolute values are safe: one executemany UPDATE and one
+        # multi-row INSERT for every unsharded line instead of two statements per line.
+        await db.execute(
+            update(models.Event),
+            [{"id": event.id, "booked_seats": event.booked_seats + tickets} for event, tickets in unsharded],
+        )
+        bookings = await db.scalars(
+            insert(models.Booking).returning(models.Booking, sort_by_parameter_order=True),
+            [
+                {"user_id": user_id, "event_id": event.id, "tickets_booked": tickets}
+                for event, tickets in unsharded
+            ],
+        )
+        for (event, tickets), db_booking in zip(unsharded, bookings.all()):
+            set_committed_value(event, "booked_seats", event.booked_seats + tickets)
+            set_committed_value(db_booking, "event", event)
+            outcomes[event.id] = db_booking
+
+    if to_waitlist:
+        entries = await waitlist_crud.insert_waitlist_entries(
+            db, user_id=user_id, tickets_by_event=to_waitlist
+        )
+        outcomes.update((entry.event_id, entry) for entry in entries)
+
+    await db.commit()
+    return [(event_id, outcomes[event_id]) for event_id in event_ids]
 
 async def get_bookings_by_user(db: AsyncSession, user_id: int) -> List[models.Booking]:
     """
@@ -67,6 +298,19 @@ async def get_bookings_by_user(db: AsyncSession, user_id: int) -> List[models.Bo
     )
     return result.scalars().all()
 
+async def get_booking_summaries_by_user(db: AsyncSession, user_id: int):
+    """
+    A user's bookings as BookingSummary columns only, newest first, including bookings
+    of archived events.
+    """
+    bookings = union_all(*(
+        select(*(getattr(table, name) for name in schemas.BookingSummary.model_fields))
+        .filter(table.user_id == user_id)
+        for table in (models.Booking, models.BookingArchive)
+    )).subquery()
+    result = await db.execute(select(bookings).order_by(bookings.c.booked_at.desc()))
+    return result.all()
+
 async def get_booking(db: AsyncSession, booking_id: int) -> models.Booking | None:
     """
     Retrieves a single booking by its ID.
@@ -77,41 +321,43 @@ async def get_booking(db: AsyncSession, booking_id: int) -> models.Booking | Non
     return result.scalars().first()
 
 
-async def cancel_booking(db: AsyncSession, booking: models.Booking) -> models.Booking:
+async def get_booking_for_update(db: AsyncSession, booking_id: int) -> models.Booking | None:
     """
-    Cancels a booking and decrements the event's booked_seats counter.
-    This function assumes the booking object is passed with its event relationship loaded.
+    Retrieves a booking with its event, locking both rows in a single round trip.
     """
-
     result = await db.execute(
-        select(models.Event)
-        .filter(models.Event.id == booking.event_id)
+        select(models.Booking)
+        .options(joinedload(models.Booking.event, innerjoin=True))
+        .filter(models.Booking.id == booking_id)
         .with_for_update()
     )
-    event = result.scalars().first()
+    return result.scalars().first()
 
-    
-    if not event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Associated event for this booking could not be found."
-        )
 
+async def cancel_booking(
+    db: AsyncSession, booking: models.Booking
+) -> Tuple[models.Booking, models.Booking | None]:
+    """
+    Cancels a booking, decrements the event's booked_seats counter and promotes the next
+    waitlist entry, all in one transaction. Returns the cancelled booking and the booking
+    promoted from the waitlist, if any.
+    This function assumes the booking and its event were loaded with get_booking_for_update.
+    """
     if booking.status == models.BookingStatus.CANCELLED:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Booking is already cancelled"
         )
-    
-    event.booked_seats -= booking.tickets_booked
+
+    event = booking.event
     booking.status = models.BookingStatus.CANCELLED
+    await return_seats(
+        db, event=event, tickets=booking.tickets_booked, seat_shard=booking.seat_shard
+    )
 
-    event_id_for_waitlist = booking.event_id
+    promoted = await waitlist_crud.process_waitlist_for_event(db=db, event=event)
     await db.commit()
-    
-    async with db.begin_nested():
-        await waitlist_crud.process_waitlist_for_event(db=db, event_id=event_id_for_waitlist)
 
-    await db.refresh(booking)
-    await db.refresh(event)  
+    if promoted is not None:
+        waitlist_crud.notify_waitlist_promotion(promoted)
 
-    return booking
+    return booking, promoted
@@ -1,10 +1,17 @@
-from typing import List
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
+from sqlalchemy import func, or_, insert, update, case
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from fastapi import HTTPException, status
 
 from app.models import models
 from app.schemas import schemas
+from app.crud import seat_shard as seat_shard_crud
+from app.crud import waitlist as waitlist_crud
 
 async def create_event(db: AsyncSession, event: schemas.EventCreate, creator_id: int) -> models.Event:
     db_event = models.Event(**event.model_dump(), created_by=creator_id)
@@ -17,11 +24,80 @@ async def get_event(db: AsyncSession, event_id: int) -> models.Event | None:
     result = await db.execute(select(models.Event).filter(models.Event.id == event_id))
     return result.scalars().first()
 
-async def get_events(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[models.Event]:
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+async def get_events(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    *,
+    venue: Optional[str] = None,
+    starts_after: Optional[datetime] = None,
+    starts_before: Optional[datetime] = None,
+    upcoming: bool = False,
+    q: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> List[models.Event]:
+    """
+    Active events ordered by start time. `venue` matches case-insensitively, `q` is a
+    case-insensitive substring search over name and venue (served by the trigram indexes).
+    With `columns`, only those columns are selected and rows are returned instead of
+    Event objects.
+    """
+    if columns:
+        query = select(*(getattr(models.Event, column) for column in columns))
+    else:
+        query = select(models.Event)
+    query = query.filter(models.Event.status == models.EventStatus.ACTIVE)
+    if venue:
+        query = query.filter(models.Event.venue.ilike(_escape_like(venue), escape="\\"))
+    if upcoming:
+        query = query.filter(models.Event.event_time >= func.now())
+    if starts_after is not None:
+        query = query.filter(models.Event.event_time >= starts_after)
+    if starts_before is not None:
+        query = query.filter(models.Event.event_time < starts_before)
+    if q:
+        pattern = f"%{_escape_like(q)}%"
+        query = query.filter(
+            or_(
+                models.Event.name.ilike(pattern, escape="\\"),
+                models.Event.venue.ilike(pattern, escape="\\"),
+            )
+        )
+
     result = await db.execute(
-        select(models.Event)
-        .filter(models.Event.status == models.EventStatus.ACTIVE) 
-        .offset(skip)
+        query.order_by(models.Event.event_time, models.Event.id).offset(skip).limit(limit)
+    )
+    return result.all() if columns else result.scalars().all()
+
+async def get_events_by_ids(db: AsyncSession, event_ids: List[int]) -> List[models.Event]:
+    result = await db.execute(select(models.Event).filter(models.Event.id.in_(event_ids)))
+    return result.scalars().all()
+
+async def get_hot_event_ids(db: AsyncSession, limit: int, velocity_minutes: int) -> List[int]:
+    """
+    Ids of the upcoming active events most likely to be read next: the most bookings in
+    the last `velocity_minutes` first, then by how soon they go on sale or take place.
+    """
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=velocity_minutes)
+    velocity = (
+        select(models.Booking.event_id, func.count().label("bookings"))
+        .filter(models.Booking.booked_at >= since)
+        .group_by(models.Booking.event_id)
+        .subquery()
+    )
+    # An on-sale that has not started yet is the moment its event gets busy.
+    next_rush = case(
+        (models.Event.on_sale_at >= func.now(), models.Event.on_sale_at),
+        else_=models.Event.event_time,
+    )
+    result = await db.execute(
+        select(models.Event.id)
+        .outerjoin(velocity, velocity.c.event_id == models.Event.id)
+        .filter(models.Event.status == models.EventStatus.ACTIVE, models.Event.event_time >= func.now())
+        .order_by(func.coalesce(velocity.c.bookings, 0).desc(), next_rush, models.Event.id)
         .limit(limit)
     )
     return result.scalars().all()
@@ -42,6 +118,7 @@ async def update_event(
 ) -> models.Event:
     """
     Updates an event's details in the database.
+    Raises 400 if the new capacity is below the seats already booked.
     """
     
     update_data = event_in.model_dump(exclude_unset=True)
@@ -49,12 +126,96 @@ async def update_event(
     
     for key, value in update_data.items():
         setattr(event_to_update, key, value)
+
+    if event_to_update.shard_count:
+        # Capacity may have changed; re-split the free seats across the shards.
+        await seat_shard_crud.rebalance(db, event_to_update)
+    elif event_to_update.capacity < event_to_update.booked_seats:
+        raise _capacity_below_booked()
         
     db.add(event_to_update)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Bookings committed since the event was read took it below the new capacity.
+        await db.rollback()
+        raise _capacity_below_booked()
     await db.refresh(event_to_update)
     return event_to_update
 
+def _capacity_below_booked() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Capacity cannot be lower than the seats already booked.",
+    )
+
+async def _write_event_rows(db: AsyncSession, rows: list, creator_id: int):
+    created, updated, errors = [], [], []
+    new_rows = [(row_no, row) for row_no, row in rows if row.id is None]
+    update_rows = [(row_no, row) for row_no, row in rows if row.id is not None]
+
+    if update_rows:
+        result = await db.execute(
+            select(models.Event.id, models.Event.shard_count)
+            .filter(models.Event.id.in_([row.id for _, row in update_rows]))
+        )
+        shard_counts = dict(result.all())
+        # Only the columns a row sets are written, as in update_event; rows setting the
+        # same columns share one executemany UPDATE.
+        values_by_columns = defaultdict(list)
+        for row_no, row in update_rows:
+            if row.id not in shard_counts:
+                errors.append({"row": row_no, "errors": [f"Event {row.id} not found"]})
+            elif shard_counts[row.id]:
+                # Capacity changes need a shard rebalance; use PUT /events/{id} instead.
+                errors.append({"row": row_no, "errors": [f"Event {row.id} is sharded and must be updated individually"]})
+            else:
+                values = row.model_dump(exclude_unset=True)
+                values_by_columns[frozenset(values)].append(values)
+                updated.append(row.id)
+        for values in values_by_columns.values():
+            await db.execute(update(models.Event), values)
+
+    if new_rows:
+        result = await db.execute(
+            insert(models.Event).returning(models.Event.id, sort_by_parameter_order=True),
+            [{**row.model_dump(exclude={"id"}), "created_by": creator_id} for _, row in new_rows],
+        )
+        created.extend(result.scalars().all())
+
+    return created, updated, errors
+
+async def bulk_write_events(
+    db: AsyncSession, rows: List[Tuple[int, schemas.EventBulkRow]], creator_id: int
+) -> Tuple[List[int], List[int], List[dict]]:
+    """
+    Writes one batch of validated (row number, row) pairs: new events with a single
+    multi-row INSERT ... RETURNING, updates with an executemany UPDATE by id per set of
+    columns the rows set.
+    If the database rejects the batch (e.g. a capacity below booked seats), it is
+    retried row by row in savepoints so only the offending rows are reported.
+    Returns the created ids, updated ids and per-row errors, and commits.
+    """
+    try:
+        async with db.begin_nested():
+            outcome = await _write_event_rows(db, rows, creator_id)
+    except DBAPIError:
+        created, updated, errors = [], [], []
+        for row_no, row in rows:
+            try:
+                async with db.begin_nested():
+                    row_created, row_updated, row_errors = await _write_event_rows(db, [(row_no, row)], creator_id)
+            except DBAPIError as exc:
+                errors.append({"row": row_no, "errors": [str(exc.orig).strip()]})
+                continue
+            created.extend(row_created)
+            updated.extend(row_updated)
+            errors.extend(row_errors)
+        outcome = created, updated, errors
+
+    await db.commit()
+    return outcome
+
 async def delete_event(db: AsyncSession, event_to_delete: models.Event):
     """
     Deletes an event from the database.
@@ -64,7 +225,7 @@ async def delete_event(db: AsyncSession, event_to_delete: models.Event):
 
 async def cancel_event(db: AsyncSession, event_to_cancel: models.Event) -> models.Event:
     """
-    Cancels an event and all of its confirmed bookings.
+    Cancels an event, all of its confirmed bookings and its pending waitlist.
     Assumes the event object is passed with its bookings relationship eagerly loaded.
     """
     
@@ -74,7 +235,8 @@ async def cancel_event(db: AsyncSession, event_to_cancel: models.Event) -> model
     for booking in event_to_cancel.bookings:
         if booking.status == models.BookingStatus.CONFIRMED:
             booking.status = models.BookingStatus.CANCELLED
-            
+    await waitlist_crud.cancel_pending_entries(db, event_to_cancel.id)
+
     await db.commit()
     await db.refresh(event_to_cancel)
     return event_to_cancel
\ No newline at end of file
@@ -0,0 +1,194 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import insert, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.models import models
+from app.crud import booking as booking_crud
+from app.crud import waitlist as waitlist_crud
+
+HOLD_TTL_SECONDS = settings.HOLD_TTL_SECONDS
+HOLD_REAPER_BATCH_SIZE = settings.HOLD_REAPER_BATCH_SIZE
+
+
+async def create_hold(db: AsyncSession, *, event_id: int, user_id: int, tickets: int) -> models.SeatHold:
+    """
+    Claims seats for a user for HOLD_TTL_SECONDS. The seats count against availability
+    straight away, but the events row is only locked for the claiming statement.
+    """
+    event, seat_shard, taken = await booking_crud.take_seats(db, event_id=event_id, tickets=tickets)
+    if not taken:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Not enough seats available to hold.",
+        )
+
+    db_hold = (
+        await db.scalars(
+            insert(models.SeatHold).returning(models.SeatHold),
+            [{
+                "user_id": user_id,
+                "event_id": event_id,
+                "tickets": tickets,
+                "seat_shard": seat_shard,
+                "expires_at": datetime.utcnow() + timedelta(seconds=HOLD_TTL_SECONDS),
+            }],
+        )
+    ).one()
+    if event is not None:
+        set_committed_value(db_hold, "event", event)
+    await db.commit()
+    return db_hold
+
+
+async def _raise_inactive_hold(db: AsyncSession, *, hold_id: int, user_id: int):
+    result = await db.execute(select(models.SeatHold).filter(models.SeatHold.id == hold_id))
+    hold = result.scalars().first()
+    if not hold or hold.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Hold not found")
+    if hold.status == models.HoldStatus.HELD:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Hold has expired")
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Hold is already {hold.status.value.lower()}",
+    )
+
+
+async def _take_active_hold(
+    db: AsyncSession, *, hold_id: int, user_id: int, new_status: models.HoldStatus
+) -> models.SeatHold:
+    """
+    Moves an unexpired hold out of HELD with a single UPDATE ... RETURNING, so a
+    confirm, a release and the reaper can never act on the same hold twice.
+    """
+    result = await db.execute(
+        update(models.SeatHold)
+        .where(
+            models.SeatHold.id == hold_id,
+            models.SeatHold.user_id == user_id,
+            models.SeatHold.status == models.HoldStatus.HELD,
+            models.SeatHold.expires_at > datetime.utcnow(),
+        )
+        .values(status=new_status)
+        .returning(models.SeatHold)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    hold = result.scalars().first()
+    if hold is None:
+        await _raise_inactive_hold(db, hold_id=hold_id, user_id=user_id)
+    return hold
+
+
+async def confirm_hold(db: AsyncSession, *, hold_id: int, user_id: int) -> models.Booking:
+    """
+    Turns an active hold into a confirmed booking. The seats were already claimed.
+    """
+    hold = await _take_active_hold(
+        db, hold_id=hold_id, user_id=user_id, new_status=models.HoldStatus.CONFIRMED
+    )
+
+    event = await db.get(models.Event, hold.event_id)
+    if event.status == models.EventStatus.CANCELLED:
+        raise HTTPException(status_code=400, detail="Cannot book tickets for a cancelled event.")
+
+    db_booking = await booking_crud.insert_booking(
+        db,
+        event_id=hold.event_id,
+        user_id=user_id,
+        tickets=hold.tickets,
+        seat_shard=hold.seat_shard,
+    )
+    set_committed_value(db_booking, "event", event)
+    await db.commit()
+    return db_booking
+
+
+async def _return_held_seats(db: AsyncSession, event_id: int, held: List[tuple]):
+    """
+    Locks the event, returns the seats of ended holds and promotes its waitlist.
+    `held` is a list of (tickets, seat_shard) pairs. Returns the event and the bookings
+    promoted from its waitlist.
+    """
+    result = await db.execute(
+        select(models.Event).filter(models.Event.id == event_id).with_for_update()
+    )
+    event = result.scalars().first()
+
+    per_shard = defaultdict(int)
+    for tickets, seat_shard in held:
+        per_shard[seat_shard] += tickets
+    for seat_shard, tickets in per_shard.items():
+        await booking_crud.return_seats(db, event=event, tickets=tickets, seat_shard=seat_shard)
+
+    promoted = await waitlist_crud.promote_waitlist(db, event)
+    return event, promoted
+
+
+async def release_hold(
+    db: AsyncSession, *, hold_id: int, user_id: int
+) -> Tuple[models.SeatHold, List[models.Booking]]:
+    """
+    Gives up an active hold, returning its seats and promoting the waitlist.
+    The hold is returned with its (locked, updated) event attached, along with the
+    bookings promoted from the waitlist.
+    """
+    hold = await _take_active_hold(
+        db, hold_id=hold_id, user_id=user_id, new_status=models.HoldStatus.RELEASED
+    )
+    event, promoted = await _return_held_seats(db, hold.event_id, [(hold.tickets, hold.seat_shard)])
+    set_committed_value(hold, "event", event)
+    await db.commit()
+
+    for booking in promoted:
+        waitlist_crud.notify_waitlist_promotion(booking)
+    return hold, promoted
+
+
+async def reap_expired_holds(db: AsyncSession) -> Tuple[int, List[models.Event], List[models.Booking]]:
+    """
+    Expires up to HOLD_REAPER_BATCH_SIZE overdue holds in one statement, then returns
+    their seats per event (locked in id order) and promotes each event's waitlist,
+    all in one transaction. Returns the number of holds expired, the affected events
+    and the bookings promoted from their waitlists.
+    """
+    overdue = (
+        select(models.SeatHold.id)
+        .where(
+            models.SeatHold.status == models.HoldStatus.HELD,
+            models.SeatHold.expires_at <= datetime.utcnow(),
+        )
+        .order_by(models.SeatHold.expires_at)
+        .limit(HOLD_REAPER_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(models.SeatHold)
+        .where(models.SeatHold.id.in_(overdue))
+        .values(status=models.HoldStatus.EXPIRED)
+        .returning(models.SeatHold.event_id, models.SeatHold.tickets, models.SeatHold.seat_shard)
+        .execution_options(synchronize_session=False)
+    )
+    expired = result.all()
+    if not expired:
+        await db.commit()
+        return 0, [], []
+
+    by_event = defaultdict(list)
+    for row in expired:
+        by_event[row.event_id].append((row.tickets, row.seat_shard))
+
+    events, promoted = [], []
+    for event_id in sorted(by_event):
+        event, bookings = await _return_held_seats(db, event_id, by_event[event_id])
+        events.append(event)
+        promoted.extend(bookings)
+    await db.commit()
+
+    for booking in promoted:
+        waitlist_crud.notify_waitlist_promotion(booking)
+    return len(expired), events, promoted
@@ -0,0 +1,224 @@
+import random
+from typing import List
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import update, delete, insert, exists, func
+
+from app.models import models
+
+Shard = models.EventSeatShard
+
+
+def _split_free_seats(shards: List[models.EventSeatShard], capacity: int) -> List[int]:
+    """
+    New per-shard capacities that keep each shard's booked seats and spread the
+    remaining free seats as evenly as possible.
+    """
+    free_total = capacity - sum(s.booked_seats for s in shards)
+    if free_total < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Capacity cannot be lower than the seats already booked.",
+        )
+    share, remainder = divmod(free_total, len(shards))
+    return [s.booked_seats + share + (1 if i < remainder else 0) for i, s in enumerate(shards)]
+
+
+async def _lock_shards(db: AsyncSession, event_id: int) -> List[models.EventSeatShard]:
+    result = await db.execute(
+        select(Shard)
+        .filter(Shard.event_id == event_id)
+        .order_by(Shard.shard_no)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return list(result.scalars().all())
+
+
+async def _claim_from(db: AsyncSession, *, event_id: int, tickets: int, only_shard: int | None):
+    has_room = Shard.capacity - Shard.booked_seats >= tickets
+    candidate = (
+        select(Shard.shard_no)
+        .where(Shard.event_id == event_id, has_room)
+        .order_by((Shard.capacity - Shard.booked_seats).desc())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if only_shard is not None:
+        candidate = candidate.where(Shard.shard_no == only_shard)
+
+    event_is_active = exists().where(
+        models.Event.id == event_id, models.Event.status == models.EventStatus.ACTIVE
+    )
+    result = await db.execute(
+        update(Shard)
+        .where(Shard.event_id == event_id, Shard.shard_no == candidate.scalar_subquery(), event_is_active)
+        .values(booked_seats=Shard.booked_seats + tickets)
+        .returning(Shard.shard_no)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none()
+
+
+async def claim_seats(db: AsyncSession, *, event_id: int, tickets: int, shard_count: int) -> int | None:
+    """
+    Claims seats from a randomly chosen shard, falling back to the unlocked shard with the
+    most room. Locked shards are skipped rather than waited on, and the events row is
+    never locked. Returns the shard number, or None if no single shard could take the
+    request right now.
+    """
+    shard_no = await _claim_from(
+        db, event_id=event_id, tickets=tickets, only_shard=random.randrange(shard_count)
+    )
+    if shard_no is None:
+        shard_no = await _claim_from(db, event_id=event_id, tickets=tickets, only_shard=None)
+    return shard_no
+
+
+async def rebalance_and_claim(db: AsyncSession, *, event: models.Event, tickets: int) -> int | None:
+    """
+    Slow path for a drained or fragmented event: locks every shard, evens out the free
+    seats and claims `tickets` from the roomiest shard in the same bulk update.
+    Returns the shard number, or None if the event as a whole has no room.
+    """
+    shards = await _lock_shards(db, event.id)
+    if not shards:
+        return None
+    capacities = _split_free_seats(shards, event.capacity)
+    free_total = event.capacity - sum(s.booked_seats for s in shards)
+    if free_total < tickets:
+        return None
+
+    chosen = max(range(len(shards)), key=lambda i: capacities[i] - shards[i].booked_seats)
+    if capacities[chosen] - shards[chosen].booked_seats < tickets:
+        # Free seats are spread too thin for one shard; give them all to the chosen one.
+        capacities = [s.booked_seats for s in shards]
+        capacities[chosen] += free_total
+
+    await db.execute(
+        update(Shard),
+        [
+            {
+                "event_id": shard.event_id,
+                "shard_no": shard.shard_no,
+                "capacity": capacities[i],
+                "booked_seats": shard.booked_seats + (tickets if i == chosen else 0),
+            }
+            for i, shard in enumerate(shards)
+        ],
+    )
+    return shards[chosen].shard_no
+
+
+async def release_seats(db: AsyncSession, *, event_id: int, shard_no: int | None, tickets: int):
+    """
+    Returns seats to the shard they were claimed from. Bookings made before the event was
+    sharded have no shard; their seats were moved into shard 0 when sharding was enabled.
+    """
+    await db.execute(
+        update(Shard)
+        .where(Shard.event_id == event_id, Shard.shard_no == (shard_no or 0))
+        .values(booked_seats=Shard.booked_seats - tickets)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def rebalance(db: AsyncSession, event: models.Event):
+    """
+    Re-spreads the free seats of a sharded event, e.g. after its capacity changed.
+    """
+    shards = await _lock_shards(db, event.id)
+    if not shards:
+        return
+    capacities = _split_free_seats(shards, event.capacity)
+    await db.execute(
+        update(Shard),
+        [
+            {"event_id": s.event_id, "shard_no": s.shard_no, "capacity": capacities[i]}
+            for i, s in enumerate(shards)
+        ],
+    )
+
+
+async def configure_seat_shards(db: AsyncSession, event: models.Event, shard_count: int) -> models.Event:
+    """
+    Enables sharded inventory with `shard_count` shards, or disables it with 0.
+    The event row must be locked by the caller. Existing shards are folded back into
+    booked_seats first, and all booked seats start out in shard 0.
+    """
+    if event.shard_count:
+        shards = await _lock_shards(db, event.id)
+        event.booked_seats = sum(s.booked_seats for s in shards)
+        await db.execute(delete(Shard).where(Shard.event_id == event.id))
+        await db.execute(
+            update(models.Booking)
+            .where(models.Booking.event_id == event.id)
+            .values(seat_shard=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            update(models.SeatHold)
+            .where(models.SeatHold.event_id == event.id, models.SeatHold.status == models.HoldStatus.HELD)
+            .values(seat_shard=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    if shard_count:
+        shards = [
+            Shard(event_id=event.id, shard_no=i, capacity=0, booked_seats=event.booked_seats if i == 0 else 0)
+            for i in range(shard_count)
+        ]
+        capacities = _split_free_seats(shards, event.capacity)
+        await db.execute(
+            insert(Shard),
+            [
+                {"event_id": s.event_id, "shard_no": s.shard_no, "capacity": capacities[i], "booked_seats": s.booked_seats}
+                for i, s in enumerate(shards)
+            ],
+        )
+
+    event.shard_count = shard_count
+    await db.commit()
+    await db.refresh(event)
+    return event
+
+
+async def fold_seat_shards(db: AsyncSession) -> List:
+    """
+    Copies the shard totals into events.booked_seats for sharded events that changed, and
+    rebalances events where some shard has drained while others still have room.
+    Returns (event_id, booked_seats, capacity) rows for the events folded.
+    """
+    totals = (
+        select(Shard.event_id, func.sum(Shard.booked_seats).label("booked"))
+        .group_by(Shard.event_id)
+        .subquery()
+    )
+    result = await db.execute(
+        update(models.Event)
+        .where(
+            models.Event.id == totals.c.event_id,
+            models.Event.shard_count > 0,
+            models.Event.booked_seats != totals.c.booked,
+        )
+        .values(booked_seats=totals.c.booked)
+        .returning(models.Event.id, models.Event.booked_seats, models.Event.capacity)
+        .execution_options(synchronize_session=False)
+    )
+    folded = result.all()
+    await db.commit()
+
+    drained = await db.execute(
+        select(models.Event)
+        .join(Shard, Shard.event_id == models.Event.id)
+        .filter(models.Event.shard_count > 0, models.Event.status == models.EventStatus.ACTIVE)
+        .group_by(models.Event.id)
+        .having(func.min(Shard.capacity - Shard.booked_seats) == 0)
+        .having(func.sum(Shard.capacity - Shard.booked_seats) > 0)
+    )
+    for event in drained.scalars().all():
+        await rebalance(db, event)
+        await db.commit()
+
+    return folded
@@ -1,11 +1,17 @@
-from sqlalchemy.orm import selectinload
+import logging
+from typing import List
+from sqlalchemy.orm import joinedload
 from fastapi import HTTPException, status
-from app.workers.celery_app import celery_app # Import celery_app
+from app.core.resilience import BackendUnavailable
+from app.workers import producer
 from app.crud import booking as booking_crud
 from app.models import models
-from app.schemas import schemas
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+logger = logging.getLogger(__name__)
 
 
 async def get_waitlist_entry(db: AsyncSession, event_id: int, user_id: int) -> models.WaitlistEntry | None:
@@ -17,6 +23,49 @@ async def get_waitlist_entry(db: AsyncSession, event_id: int, user_id: int) -> m
     return result.scalars().first()
 
 
+async def get_pending_entries(db: AsyncSession, event_id: int) -> List[models.WaitlistEntry]:
+    """An event's pending waitlist entries in promotion order."""
+    result = await db.execute(
+        select(models.WaitlistEntry)
+        .filter_by(event_id=event_id, status=models.WaitlistStatus.PENDING)
+        .order_by(models.WaitlistEntry.created_at.asc(), models.WaitlistEntry.id.asc())
+    )
+    return result.scalars().all()
+
+
+async def cancel_waitlist_entry(db: AsyncSession, *, event_id: int, user_id: int) -> models.WaitlistEntry:
+    """Takes a user off an event's waitlist with a single UPDATE ... RETURNING."""
+    result = await db.execute(
+        update(models.WaitlistEntry)
+        .where(
+            models.WaitlistEntry.event_id == event_id,
+            models.WaitlistEntry.user_id == user_id,
+            models.WaitlistEntry.status == models.WaitlistStatus.PENDING,
+        )
+        .values(status=models.WaitlistStatus.CANCELLED)
+        .returning(models.WaitlistEntry)
+        .execution_options(synchronize_session=False)
+    )
+    entry = result.scalars().first()
+    if entry is None:
+        raise HTTPException(status_code=404, detail="You are not on the waitlist for this event")
+    await db.commit()
+    return entry
+
+
+async def cancel_pending_entries(db: AsyncSession, event_id: int):
+    """Cancels an event's whole waitlist, without committing."""
+    await db.execute(
+        update(models.WaitlistEntry)
+        .where(
+            models.WaitlistEntry.event_id == event_id,
+            models.WaitlistEntry.status == models.WaitlistStatus.PENDING,
+        )
+        .values(status=models.WaitlistStatus.CANCELLED)
+        .execution_options(synchronize_session=False)
+    )
+
+
 async def add_to_waitlist(
     db: AsyncSession, *, event_id: int, user_id: int, tickets_requested: int
 ) -> models.WaitlistEntry:
@@ -26,59 +75,112 @@ async def add_to_waitlist(
     if existing_entry:
         return existing_entry # User is already pending, so just return the existing entry.
 
-    db_waitlist_entry = models.WaitlistEntry(
-        user_id=user_id,
-        event_id=event_id,
-        tickets_requested=tickets_requested,
-    )
-    db.add(db_waitlist_entry)
+    db_waitlist_entry = (
+        await db.scalars(
+            insert(models.WaitlistEntry).returning(models.WaitlistEntry),
+            [{"user_id": user_id, "event_id": event_id, "tickets_requested": tickets_requested}],
+        )
+    ).one()
     await db.commit()
-    await db.refresh(db_waitlist_entry)
     return db_waitlist_entry
 
 
+async def insert_waitlist_entries(
+    db: AsyncSession, *, user_id: int, tickets_by_event: dict
+) -> List[models.WaitlistEntry]:
+    """
+    Waitlists a user for several events at once, without committing. Events the user is
+    already waiting for keep their existing entry. Returns the entries in event id order.
+    """
+    result = await db.execute(
+        select(models.WaitlistEntry)
+        .filter(
+            models.WaitlistEntry.user_id == user_id,
+            models.WaitlistEntry.event_id.in_(list(tickets_by_event)),
+            models.WaitlistEntry.status == models.WaitlistStatus.PENDING,
+        )
+    )
+    entries = {entry.event_id: entry for entry in result.scalars().all()}
+
+    new_event_ids = [event_id for event_id in sorted(tickets_by_event) if event_id not in entries]
+    if new_event_ids:
+        new_entries = await db.scalars(
+            insert(models.WaitlistEntry).returning(models.WaitlistEntry, sort_by_parameter_order=True),
+            [
+                {"user_id": user_id, "event_id": event_id, "tickets_requested": tickets_by_event[event_id]}
+                for event_id in new_event_ids
+            ],
+        )
+        entries.update(zip(new_event_ids, new_entries.all()))
+    return [entries[event_id] for event_id in sorted(entries)]
 
 
-async def process_waitlist_for_event(db: AsyncSession, event_id: int):
+async def process_waitlist_for_event(
+    db: AsyncSession, event: models.Event
+) -> models.Booking | None:
     """
-    Checks the waitlist for an event and processes the next entry if seats are available.
+    Promotes the next waitlist entry for an event if enough seats are available.
+    The event row must already be locked by the caller, and the caller commits.
+    Returns the booking made for the entry (with its user and event attached) or None.
     """
-    event_result = await db.execute(select(models.Event).filter(models.Event.id == event_id).with_for_update())
-    event = event_result.scalars().first()
-    if not event: return
-    
+    if event.status != models.EventStatus.ACTIVE:
+        return None
+    # booked_seats is only folded periodically for sharded events; the shard claim decides.
     available_seats = event.capacity - event.booked_seats
-    if available_seats <= 0: return
+    if not event.shard_count and available_seats <= 0:
+        return None
 
     waitlist_entry_result = await db.execute(
         select(models.WaitlistEntry)
-        .options(selectinload(models.WaitlistEntry.user))
-        .filter_by(event_id=event_id, status=models.WaitlistStatus.PENDING)
-        .order_by(models.WaitlistEntry.created_at.asc())
+        .options(joinedload(models.WaitlistEntry.user, innerjoin=True))
+        .filter_by(event_id=event.id, status=models.WaitlistStatus.PENDING)
+        .order_by(models.WaitlistEntry.created_at.asc(), models.WaitlistEntry.id.asc())
         .limit(1)
     )
     next_in_line = waitlist_entry_result.scalars().first()
 
-    if next_in_line and available_seats >= next_in_line.tickets_requested:
-        new_booking_or_entry = await booking_crud.create_booking(
-            db=db, 
-            booking=schemas.BookingCreate(
-                event_id=next_in_line.event_id,
-                tickets_booked=next_in_line.tickets_requested
-            ), 
-            user_id=next_in_line.user_id
-        )
+    if not next_in_line:
+        return None
+    if not event.shard_count and available_seats < next_in_line.tickets_requested:
+        return None
 
-        if isinstance(new_booking_or_entry, models.Booking):
-            next_in_line.status = models.WaitlistStatus.FULFILLED
-            db.add(next_in_line)
-            await db.commit()
-            
-            celery_app.send_task(
-                'send_waitlist_success_email',
-                args=[
-                    next_in_line.user.email,
-                    next_in_line.user.full_name,
-                    event.name
-                ]
-            )
\ No newline at end of file
+    promoted_booking = await booking_crud.book_seats(
+        db,
+        event=event,
+        user_id=next_in_line.user_id,
+        tickets=next_in_line.tickets_requested,
+    )
+    if promoted_booking is None:
+        return None
+    next_in_line.status = models.WaitlistStatus.FULFILLED
+    set_committed_value(promoted_booking, "user", next_in_line.user)
+    return promoted_booking
+
+
+async def promote_waitlist(db: AsyncSession, event: models.Event) -> List[models.Booking]:
+    """
+    Promotes waitlist entries in order for as long as the next one fits, e.g. after
+    several seats were returned at once. Same locking and commit rules as above.
+    """
+    promoted = []
+    while True:
+        booking = await process_waitlist_for_event(db=db, event=event)
+        if booking is None:
+            return promoted
+        promoted.append(booking)
+
+
+def notify_waitlist_promotion(booking: models.Booking):
+    """
+    Queues the success email for a booking promoted from the waitlist. Call after the commit.
+    The promotion stands even if the broker is down; only the email is lost.
+    """
+    try:
+        producer.enqueue(
+            'send_waitlist_success_email',
+            user_email=booking.user.email,
+            user_name=booking.user.full_name,
+            event_name=booking.event.name,
+        )
+    except BackendUnavailable:
+        logger.warning(f"Could not queue the waitlist success email for booking {booking.id}.")
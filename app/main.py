@@ -1,17 +1,83 @@
-from fastapi import FastAPI
-from app.api import auth, events, bookings, admin 
+import logging
+from contextlib import asynccontextmanager
+
+import math
+
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
+from app.api import auth, events, bookings, admin, holds
+from app.core import query_counter, redis_client, profiling
+from app.core.resilience import BackendUnavailable
+from app.db.session import engine, warm_engine, AsyncSessionLocal
+from app.services import availability, event_cache
+
+logger = logging.getLogger(__name__)
+
+# Every worker process starts at once on a deploy; the first to claim this key pre-warms
+# the shared cache for all of them.
+PREWARM_CLAIM_KEY = "events:prewarm:startup"
+PREWARM_CLAIM_SECONDS = 60
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Per worker process: pre-open database and Redis connections and pre-warm the event
+    cache before taking traffic, and close them cleanly once the server has drained.
+    """
+    try:
+        await warm_engine()
+        await redis_client.warm_pools()
+    except Exception:
+        # A backend that is down at boot should not keep the API from starting.
+        logger.exception("Could not warm connection pools; continuing with cold pools.")
+    try:
+        client = redis_client.get_redis_client()
+        if await client.set(PREWARM_CLAIM_KEY, 1, nx=True, ex=PREWARM_CLAIM_SECONDS):
+            async with AsyncSessionLocal() as db:
+                pages, events = await event_cache.prewarm(client, db)
+            logger.info(f"Pre-warmed {pages} event list pages and {events} events.")
+    except Exception:
+        logger.exception("Could not pre-warm the event cache; continuing with a cold cache.")
+    yield
+    await availability.close_hub()
+    await redis_client.close_pools()
+    await engine.dispose()
+
 
 app = FastAPI(
     title="Evently API",
     description="Backend system for the Evently platform.",
     version="0.1.0",
+    # orjson renders every JSON response that is not already pre-rendered.
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Routers
 app.include_router(auth.router, prefix="/auth")
 app.include_router(events.router)
 app.include_router(bookings.router)
+app.include_router(holds.router)
 app.include_router(admin.router, prefix="/admin") 
+
+@app.exception_handler(BackendUnavailable)
+async def backend_unavailable_handler(request: Request, exc: BackendUnavailable):
+    """
+    A backend the request depends on is down: 503 with a hint for when to retry, instead
+    of a 500 after waiting out its timeouts.
+    """
+    return ORJSONResponse(
+        status_code=503,
+        content={"detail": f"{exc.name} is temporarily unavailable. Please retry."},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+# Per-request SQL statement counting (debug/test mode only)
+query_counter.install(app, engine)
+# Admin-requested profiles of single requests
+profiling.install(app, engine)
+
 @app.get("/", tags=["Health Check"])
 async def read_root():
     """
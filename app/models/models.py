@@ -5,9 +5,13 @@ from sqlalchemy import (
     Integer,
     String,
     DateTime,
+    Date,
     ForeignKey,
     Enum,  
-    func
+    CheckConstraint,
+    Index,
+    func,
+    text
 )
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -31,6 +35,14 @@ class EventStatus(str, enum.Enum):
 class WaitlistStatus(str, enum.Enum):
     PENDING = "PENDING"
     FULFILLED = "FULFILLED"
+    CANCELLED = "CANCELLED"
+
+
+class HoldStatus(str, enum.Enum):
+    HELD = "HELD"
+    CONFIRMED = "CONFIRMED"
+    RELEASED = "RELEASED"
+    EXPIRED = "EXPIRED"
 
 
 class User(Base):
@@ -50,32 +62,63 @@ class User(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        CheckConstraint(
+            "booked_seats >= 0 AND booked_seats <= capacity",
+            name="ck_events_booked_seats_within_capacity",
+        ),
+        # Listing and date-range filters: WHERE status = ... AND event_time ... ORDER BY event_time.
+        Index("ix_events_status_event_time", "status", "event_time"),
+        # Free-text and venue search use ILIKE, which pg_trgm GIN indexes can serve.
+        Index(
+            "ix_events_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_events_venue_trgm", "venue",
+            postgresql_using="gin", postgresql_ops={"venue": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     venue = Column(String, nullable=False)
     event_time = Column(DateTime(timezone=True), nullable=False)
+    # When set, bookings go through a Redis waiting room around this time.
+    on_sale_at = Column(DateTime(timezone=True), nullable=True)
     capacity = Column(Integer, nullable=False)
     booked_seats = Column(Integer, default=0, nullable=False)
     status = Column(Enum(EventStatus), default=EventStatus.ACTIVE, nullable=False)
+    # booked_seats includes seats on active holds (see SeatHold).
+    # 0 means booked_seats is the live counter; K > 0 means seats are claimed from K
+    # EventSeatShard rows and booked_seats is periodically folded from them.
+    shard_count = Column(Integer, default=0, server_default="0", nullable=False)
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    # Set once the event's bookings and waitlist were moved to the archive tables.
+    archived_at = Column(DateTime, nullable=True)
 
     creator = relationship("User", back_populates="events_created")
     bookings = relationship("Booking", back_populates="event")
     waitlist_entries = relationship("WaitlistEntry", back_populates="event")
+    seat_shards = relationship("EventSeatShard", back_populates="event")
 
 
 class Booking(Base):
     __tablename__ = "bookings"
-    
+    __table_args__ = (
+        # Cache pre-warming ranks events by their bookings in the last few minutes.
+        Index("ix_bookings_booked_at", "booked_at"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
     tickets_booked = Column(Integer, nullable=False)
     status = Column(Enum(BookingStatus), default=BookingStatus.CONFIRMED, nullable=False)
     booked_at = Column(DateTime, default=datetime.utcnow)
+    seat_shard = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="bookings")
     event = relationship("Event", back_populates="bookings")
@@ -83,6 +126,14 @@ class Booking(Base):
 
 class WaitlistEntry(Base):
     __tablename__ = "waitlist_entries"
+    __table_args__ = (
+        # Promotion and the position index only ever read an event's pending entries in order.
+        Index(
+            "ix_waitlist_entries_pending_event_created",
+            "event_id", "created_at",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -93,3 +144,102 @@ class WaitlistEntry(Base):
 
     user = relationship("User", back_populates="waitlist_entries")
     event = relationship("Event", back_populates="waitlist_entries")
+
+
+class EventSeatShard(Base):
+    __tablename__ = "event_seat_shards"
+    __table_args__ = (
+        CheckConstraint(
+            "booked_seats >= 0 AND booked_seats <= capacity",
+            name="ck_event_seat_shards_booked_seats_within_capacity",
+        ),
+    )
+
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True)
+    shard_no = Column(Integer, primary_key=True)
+    capacity = Column(Integer, nullable=False)
+    booked_seats = Column(Integer, default=0, nullable=False)
+
+    event = relationship("Event", back_populates="seat_shards")
+
+
+class SeatHold(Base):
+    __tablename__ = "seat_holds"
+    __table_args__ = (
+        # The reaper only ever scans active holds by expiry.
+        Index(
+            "ix_seat_holds_active_expires_at",
+            "expires_at",
+            postgresql_where=text("status = 'HELD'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    tickets = Column(Integer, nullable=False)
+    seat_shard = Column(Integer, nullable=True)
+    status = Column(Enum(HoldStatus), default=HoldStatus.HELD, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    user = relationship("User")
+    event = relationship("Event")
+
+
+# --- Archive ---
+# Bookings and waitlist entries of long-past events are moved out of the hot tables by
+# the archival job. The archive tables are range-partitioned by the event's month; the
+# job creates each month's partition (e.g. bookings_archive_2025_09) when first needed.
+
+class BookingArchive(Base):
+    __tablename__ = "bookings_archive"
+    __table_args__ = (
+        Index("ix_bookings_archive_user_id", "user_id"),
+        Index("ix_bookings_archive_event_id", "event_id"),
+        {"postgresql_partition_by": "RANGE (event_time)"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    # The partition key has to be part of the primary key.
+    event_time = Column(DateTime(timezone=True), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    event_id = Column(Integer, nullable=False)
+    tickets_booked = Column(Integer, nullable=False)
+    status = Column(Enum(BookingStatus), nullable=False)
+    booked_at = Column(DateTime)
+    seat_shard = Column(Integer, nullable=True)
+
+
+class WaitlistEntryArchive(Base):
+    __tablename__ = "waitlist_entries_archive"
+    __table_args__ = (
+        Index("ix_waitlist_entries_archive_user_id", "user_id"),
+        {"postgresql_partition_by": "RANGE (event_time)"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    event_time = Column(DateTime(timezone=True), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    event_id = Column(Integer, nullable=False)
+    tickets_requested = Column(Integer, nullable=False)
+    status = Column(Enum(WaitlistStatus), nullable=False)
+    created_at = Column(DateTime)
+
+
+class EventBookingStats(Base):
+    """Booking totals of an archived event, kept for analytics."""
+    __tablename__ = "event_booking_stats"
+
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True)
+    confirmed_bookings = Column(Integer, default=0, nullable=False)
+    cancelled_bookings = Column(Integer, default=0, nullable=False)
+    tickets_booked = Column(Integer, default=0, nullable=False)
+
+
+class BookingDailyStats(Base):
+    """Bookings per day that were archived, kept for analytics."""
+    __tablename__ = "booking_daily_stats"
+
+    date = Column(Date, primary_key=True)
+    booking_count = Column(Integer, default=0, nullable=False)
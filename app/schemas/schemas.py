@@ -1,7 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional, List
-from app.models.models import UserRole, BookingStatus, EventStatus, WaitlistStatus
+from typing import Optional, List, Dict, Literal
+from app.models.models import UserRole, BookingStatus, EventStatus, WaitlistStatus, HoldStatus
 
 # --- User Schemas ---
 class UserBase(BaseModel):
@@ -25,6 +25,7 @@ class EventBase(BaseModel):
     venue: str
     event_time: datetime
     capacity: int
+    on_sale_at: Optional[datetime] = None
 
 class EventCreate(EventBase):
     pass
@@ -33,6 +34,7 @@ class Event(EventBase):
     id: int
     booked_seats: int
     status: EventStatus
+    shard_count: int = 0
     created_by: int
     created_at: datetime
     updated_at: datetime
@@ -40,24 +42,80 @@ class Event(EventBase):
     class Config:
         from_attributes = True
 
+class EventSummary(BaseModel):
+    """Compact event for lists; `GET /events?view=summary`."""
+    id: int
+    name: str
+    venue: str
+    event_time: datetime
+    capacity: int
+    booked_seats: int
+    status: EventStatus
+
+    class Config:
+        from_attributes = True
+
+class EventBulkRow(EventBase):
+    # Rows with an id update that event; rows without one create a new event.
+    id: Optional[int] = None
+
+class EventBulkError(BaseModel):
+    row: int
+    errors: List[str]
+
+class EventBulkResult(BaseModel):
+    created: List[int]
+    updated: List[int]
+    errors: List[EventBulkError]
+
+class SeatShardConfig(BaseModel):
+    shard_count: int = Field(..., ge=0, le=256)
+
 # --- Booking Schemas ---
 class BookingBase(BaseModel):
     event_id: int
     tickets_booked: int
 
 class BookingCreate(BookingBase):
-    pass
+    queue_token: Optional[str] = None
+
+class CartLine(BaseModel):
+    event_id: int
+    tickets_booked: int = Field(..., gt=0)
+
+class CartBookingCreate(BaseModel):
+    lines: List[CartLine] = Field(..., min_length=1, max_length=20)
+    # all_or_nothing books every line or none; best_effort books what fits and
+    # waitlists the rest, like separate booking requests would.
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+    # Queue tokens for events that are in a waiting room, keyed by event id.
+    queue_tokens: Dict[int, str] = {}
 
 class Booking(BookingBase):
     id: int
     user_id: int
     status: BookingStatus
     booked_at: datetime
-    event: Event 
+    # None only for an archived booking whose event has been deleted.
+    event: Optional[Event]
+
+    class Config:
+        from_attributes = True
+
+class BookingSummary(BookingBase):
+    """A booking that refers to its event by id instead of embedding it."""
+    id: int
+    status: BookingStatus
+    booked_at: datetime
 
     class Config:
         from_attributes = True
 
+class BookingsNormalized(BaseModel):
+    """Bookings with each referenced event listed once."""
+    bookings: List[BookingSummary]
+    events: List[EventSummary]
+
 class PopularEvent(BaseModel):
     event_id: int
     event_name: str
@@ -93,3 +151,35 @@ class WaitlistEntry(WaitlistEntryBase):
 
     class Config:
         from_attributes = True
+
+class WaitlistPosition(BaseModel):
+    event_id: int
+    # 1 for the next entry to be promoted.
+    position: int
+    entries_ahead: int
+    tickets_ahead: int
+    tickets_requested: int
+
+# --- Seat Hold Schemas ---
+class SeatHoldCreate(BaseModel):
+    tickets: int = Field(..., gt=0)
+    queue_token: Optional[str] = None
+
+class SeatHold(BaseModel):
+    id: int
+    event_id: int
+    user_id: int
+    tickets: int
+    status: HoldStatus
+    expires_at: datetime
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# --- Waiting Room Schemas ---
+class QueuePosition(BaseModel):
+    token: str
+    position: int
+    admitted: bool
+    eta_seconds: Optional[float] = None
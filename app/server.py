@@ -0,0 +1,26 @@
+"""
+Production entry point for the API: `python -m app.server`.
+
+Runs WEB_CONCURRENCY uvicorn worker processes (one per CPU by default) behind one
+socket. On SIGTERM, workers stop accepting connections and get GRACEFUL_TIMEOUT_SECONDS
+to finish in-flight requests before the lifespan closes their pools.
+"""
+import uvicorn
+
+from app.core.config import settings
+
+
+def main():
+    uvicorn.run(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WEB_CONCURRENCY,
+        timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT_SECONDS,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+    )
+
+
+if __name__ == "__main__":
+    main()
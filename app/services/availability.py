@@ -0,0 +1,191 @@
+import json
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Set
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.redis_client import cache_breaker
+from app.core.resilience import BackendUnavailable
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_CHANNEL = "events:availability"
+# Each subscriber receives at most one message per event per interval.
+AVAILABILITY_COALESCE_SECONDS = settings.AVAILABILITY_COALESCE_SECONDS
+AVAILABILITY_MAX_EVENTS_PER_STREAM = settings.AVAILABILITY_MAX_EVENTS_PER_STREAM
+
+
+async def publish_seat_change(
+    redis_client: redis.Redis,
+    event_id: int,
+    *,
+    delta: Optional[int] = None,
+    booked_seats: Optional[int] = None,
+    capacity: Optional[int] = None,
+    status: Optional[str] = None,
+):
+    """
+    Publishes a seat count change for an event. `booked_seats` is the new absolute value
+    when the publisher knows it; otherwise subscribers apply `delta` to the last value.
+    Best effort: a failed publish never fails the booking that caused it.
+    """
+    message = {"event_id": event_id, "delta": delta, "booked_seats": booked_seats}
+    if capacity is not None:
+        message["capacity"] = capacity
+    if status is not None:
+        message["status"] = status
+    try:
+        with cache_breaker.guard():
+            await redis_client.publish(AVAILABILITY_CHANNEL, json.dumps(message))
+    except BackendUnavailable:
+        logger.warning(f"Failed to publish availability change for event {event_id}.", exc_info=True)
+
+
+async def publish_event_state(redis_client: redis.Redis, event):
+    """
+    Publishes the absolute state of an event loaded in the current transaction.
+    booked_seats of a sharded event is only folded periodically, so it is left out.
+    """
+    await publish_seat_change(
+        redis_client,
+        event.id,
+        booked_seats=None if event.shard_count else event.booked_seats,
+        capacity=event.capacity,
+        status=event.status.value,
+    )
+
+
+def snapshot(event) -> dict:
+    return {
+        "event_id": event.id,
+        "capacity": event.capacity,
+        "booked_seats": event.booked_seats,
+        "available_seats": max(event.capacity - event.booked_seats, 0),
+        "status": event.status.value if hasattr(event.status, "value") else event.status,
+    }
+
+
+def apply_change(state: dict, change: dict) -> dict:
+    if change.get("booked_seats") is not None:
+        state["booked_seats"] = change["booked_seats"]
+    elif change.get("delta") is not None:
+        state["booked_seats"] = state.get("booked_seats", 0) + change["delta"]
+    for key in ("capacity", "status"):
+        if change.get(key) is not None:
+            state[key] = change[key]
+    state["available_seats"] = max(state.get("capacity", 0) - state.get("booked_seats", 0), 0)
+    return state
+
+
+class AvailabilityHub:
+    """
+    One Redis subscription per process, fanned out to every local stream that watches
+    the event. Started on the first subscriber and stopped after the last one leaves.
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis_client = redis_client
+        self.subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    def subscribe(self, event_ids: Iterable[int]) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=1000)
+        for event_id in event_ids:
+            self.subscribers.setdefault(event_id, set()).add(queue)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+        return queue
+
+    def unsubscribe(self, event_ids: Iterable[int], queue: asyncio.Queue):
+        for event_id in event_ids:
+            queues = self.subscribers.get(event_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self.subscribers[event_id]
+        if not self.subscribers and self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+
+    async def _read(self):
+        while True:
+            pubsub = self.redis_client.pubsub()
+            try:
+                await pubsub.subscribe(AVAILABILITY_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    self._dispatch(json.loads(message["data"]))
+            except redis.RedisError:
+                logger.exception("Availability subscription lost, reconnecting.")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def _dispatch(self, change: dict):
+        for queue in list(self.subscribers.get(change["event_id"], ())):
+            try:
+                queue.put_nowait(change)
+            except asyncio.QueueFull:
+                # A stalled stream drops changes; the next absolute
+                # booked_seats value corrects its counts.
+                pass
+
+
+_hub: Optional[AvailabilityHub] = None
+
+
+def get_hub(redis_client: redis.Redis) -> AvailabilityHub:
+    global _hub
+    if _hub is None:
+        _hub = AvailabilityHub(redis_client)
+    return _hub
+
+
+async def close_hub():
+    """
+    Stops this process's subscription; open streams end with the server's shutdown.
+    """
+    global _hub
+    if _hub is not None and _hub._reader is not None:
+        _hub._reader.cancel()
+        try:
+            await _hub._reader
+        except (asyncio.CancelledError, Exception):
+            pass
+    _hub = None
+
+
+async def stream(hub: AvailabilityHub, initial: Dict[int, dict]):
+    """
+    Server-Sent Events for the watched events: the current snapshot first, then at most
+    one coalesced update per event per AVAILABILITY_COALESCE_SECONDS.
+    """
+    queue = hub.subscribe(initial.keys())
+    state = {event_id: dict(values) for event_id, values in initial.items()}
+    try:
+        for values in state.values():
+            yield f"event: availability\ndata: {json.dumps(values)}\n\n"
+
+        while True:
+            changed = set()
+            try:
+                change = await asyncio.wait_for(queue.get(), timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            apply_change(state[change["event_id"]], change)
+            changed.add(change["event_id"])
+
+            # Fold in everything else that arrives within the coalescing window.
+            await asyncio.sleep(AVAILABILITY_COALESCE_SECONDS)
+            while not queue.empty():
+                change = queue.get_nowait()
+                apply_change(state[change["event_id"]], change)
+                changed.add(change["event_id"])
+
+            for event_id in changed:
+                yield f"event: availability\ndata: {json.dumps(state[event_id])}\n\n"
+    finally:
+        hub.unsubscribe(initial.keys(), queue)
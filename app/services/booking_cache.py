@@ -0,0 +1,129 @@
+import logging
+from collections import defaultdict
+from typing import Iterable, List
+
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import cache_breaker
+from app.core.resilience import BackendUnavailable
+from app.core.responses import dump_json
+from app.crud import booking as booking_crud
+from app.schemas import schemas
+
+logger = logging.getLogger(__name__)
+
+BOOKING_CACHE_TTL_SECONDS = settings.BOOKING_CACHE_TTL_SECONDS
+# Marks a loaded history, so a user without bookings is cached too.
+LOADED_FIELD = "_"
+
+# Applies booking states to a user's history, but only if it is loaded: a write never
+# creates a partial history. Always bumps the version so a concurrent rebuild that read
+# the database before this write does not install its stale snapshot.
+# KEYS: entries, order, version. ARGV: ttl, then (booking id, score, json) triples.
+_WRITE_SCRIPT = """
+redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[1])
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+for i = 2, #ARGV, 3 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 2])
+    redis.call('ZADD', KEYS[2], ARGV[i + 1], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+
+# Replaces a user's history with a snapshot read at version ARGV[1].
+# KEYS: entries, order, version. ARGV: version, ttl, then (booking id, score, json) triples.
+_INSTALL_SCRIPT = """
+if (redis.call('GET', KEYS[3]) or '') ~= ARGV[1] then return 0 end
+redis.call('DEL', KEYS[1], KEYS[2])
+redis.call('HSET', KEYS[1], '""" + LOADED_FIELD + """', '')
+for i = 3, #ARGV, 3 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 2])
+    redis.call('ZADD', KEYS[2], ARGV[i + 1], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return 1
+"""
+
+
+def _keys(user_id: int) -> List[str]:
+    return [f"user:{user_id}:bookings", f"user:{user_id}:bookings:order", f"user:{user_id}:bookings:version"]
+
+
+def _render(bookings: Iterable) -> List[tuple]:
+    return [
+        (booking.id, booking.booked_at.timestamp(), dump_json(schemas.BookingSummary, booking))
+        for booking in bookings
+    ]
+
+
+def _flatten(rendered: List[tuple]) -> list:
+    return [value for triple in rendered for value in triple]
+
+
+async def record(redis_client: redis.Redis, bookings: Iterable):
+    """
+    Writes the current state of new, promoted or cancelled bookings through to their
+    users' cached histories, one script call per user in a single pipeline.
+    Call after the commit. While Redis is unavailable the write is skipped, so a history
+    cached before the outage stays stale until it expires.
+    """
+    by_user = defaultdict(list)
+    for booking in bookings:
+        by_user[booking.user_id].append(booking)
+    if not by_user:
+        return
+
+    write = redis_client.register_script(_WRITE_SCRIPT)
+    try:
+        with cache_breaker.guard():
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for user_id, user_bookings in by_user.items():
+                    await write(
+                        keys=_keys(user_id),
+                        args=[BOOKING_CACHE_TTL_SECONDS, *_flatten(_render(user_bookings))],
+                        client=pipe,
+                    )
+                await pipe.execute()
+    except BackendUnavailable:
+        logger.warning(f"Could not update cached booking histories of users {list(by_user)}.")
+
+
+async def get_bookings(redis_bytes_client: redis.Redis, db: AsyncSession, user_id: int) -> List[bytes]:
+    """
+    A user's bookings as rendered `schemas.BookingSummary` JSON, newest first, in one
+    round trip. On a miss the history is rebuilt from one query and installed unless a
+    booking changed for the user in the meantime. While Redis is unavailable the
+    history is read from the database.
+    """
+    entries_key, order_key, version_key = _keys(user_id)
+    try:
+        with cache_breaker.guard():
+            async with redis_bytes_client.pipeline(transaction=False) as pipe:
+                pipe.hgetall(entries_key)
+                pipe.zrevrange(order_key, 0, -1)
+                pipe.get(version_key)
+                entries, order, version = await pipe.execute()
+    except BackendUnavailable:
+        rows = await booking_crud.get_booking_summaries_by_user(db=db, user_id=user_id)
+        return [body for _, _, body in _render(rows)]
+    if entries:
+        return [entries[booking_id] for booking_id in order if booking_id in entries]
+
+    rows = await booking_crud.get_booking_summaries_by_user(db=db, user_id=user_id)
+    rendered = _render(rows)
+    install = redis_bytes_client.register_script(_INSTALL_SCRIPT)
+    try:
+        with cache_breaker.guard():
+            await install(
+                keys=[entries_key, order_key, version_key],
+                args=[version or b"", BOOKING_CACHE_TTL_SECONDS, *_flatten(rendered)],
+            )
+    except BackendUnavailable:
+        pass
+    return [body for _, _, body in rendered]
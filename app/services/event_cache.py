@@ -0,0 +1,193 @@
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import cache_breaker
+from app.core.resilience import BackendUnavailable, LocalCache
+from app.core.responses import dump_json
+from app.crud import event as event_crud
+from app.schemas import schemas
+
+logger = logging.getLogger(__name__)
+
+EVENT_CACHE_TTL_SECONDS = settings.RESPONSE_CACHE_TTL_SECONDS
+PREWARM_LIST_PAGES = settings.PREWARM_LIST_PAGES
+PREWARM_PAGE_SIZE = settings.PREWARM_PAGE_SIZE
+PREWARM_HOT_EVENTS = settings.PREWARM_HOT_EVENTS
+PREWARM_VELOCITY_MINUTES = settings.PREWARM_VELOCITY_MINUTES
+# The listings pre-warmed page by page: all events and upcoming events only.
+PREWARM_LIST_FILTERS = ({}, {"upcoming": True})
+# Part of every id list key; bumping it invalidates all cached lists at once.
+LIST_GENERATION_KEY = "events:ids:gen"
+
+# Copies of what was last read or loaded, served only while Redis is unavailable, so an
+# outage does not send every read to Postgres.
+_local_bodies = LocalCache(settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_TTL_SECONDS)
+_local_ids = LocalCache(settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_TTL_SECONDS)
+
+
+def event_key(event_id: int) -> str:
+    return f"event:{event_id}"
+
+
+async def list_key(redis_client: redis.Redis, skip: int, limit: int, filters: dict) -> str:
+    """
+    Key of the cached, ordered id list for one page and filter combination. Filters
+    are normalized and hashed so free-text values never end up in the key itself.
+    """
+    generation = int(await redis_client.get(LIST_GENERATION_KEY) or 0)
+    key = f"events:ids:{generation}:{skip}:{limit}"
+    active = {k: v for k, v in filters.items() if v not in (None, "", False)}
+    if active:
+        normalized = json.dumps(active, sort_keys=True, default=str).lower()
+        key += f":{hashlib.sha1(normalized.encode()).hexdigest()[:16]}"
+    return key
+
+
+async def get_event_ids(
+    redis_client: redis.Redis, db: AsyncSession, *, skip: int, limit: int, filters: dict
+) -> List[int]:
+    local_key = (skip, limit, json.dumps(filters, sort_keys=True, default=str))
+    try:
+        with cache_breaker.guard():
+            key = await list_key(redis_client, skip, limit, filters)
+            cached = await redis_client.get(key)
+    except BackendUnavailable:
+        key, cached = None, _local_ids.get(local_key)
+    if cached is not None:
+        event_ids = orjson.loads(cached)
+        _local_ids.set(local_key, cached)
+        return event_ids
+
+    rows = await event_crud.get_events(db, skip=skip, limit=limit, columns=["id"], **filters)
+    event_ids = [row.id for row in rows]
+    cached = orjson.dumps(event_ids)
+    _local_ids.set(local_key, cached)
+    if key is not None:
+        try:
+            with cache_breaker.guard():
+                await redis_client.set(key, cached, ex=EVENT_CACHE_TTL_SECONDS)
+        except BackendUnavailable:
+            pass
+    return event_ids
+
+
+async def get_event_bodies(
+    redis_bytes_client: redis.Redis, db: AsyncSession, event_ids: List[int]
+) -> Dict[int, bytes]:
+    """
+    Rendered `schemas.Event` JSON per event id: one MGET of the per-event keys shared
+    with GET /events/{id}, then one `WHERE id IN (...)` query for the misses, which are
+    written back in one pipeline. Ids that no longer exist are left out.
+    While Redis is unavailable, the in-process copies stand in for the MGET.
+    """
+    if not event_ids:
+        return {}
+    redis_available = True
+    try:
+        with cache_breaker.guard():
+            cached = await redis_bytes_client.mget([event_key(event_id) for event_id in event_ids])
+    except BackendUnavailable:
+        redis_available = False
+        cached = [_local_bodies.get(event_id) for event_id in event_ids]
+    bodies = {event_id: body for event_id, body in zip(event_ids, cached) if body is not None}
+
+    missing = [event_id for event_id in event_ids if event_id not in bodies]
+    if missing:
+        for event in await event_crud.get_events_by_ids(db, missing):
+            bodies[event.id] = dump_json(schemas.Event, event)
+        if redis_available:
+            try:
+                with cache_breaker.guard():
+                    async with redis_bytes_client.pipeline(transaction=False) as pipe:
+                        for event_id in missing:
+                            if event_id in bodies:
+                                pipe.set(event_key(event_id), bodies[event_id], ex=EVENT_CACHE_TTL_SECONDS)
+                        await pipe.execute()
+            except BackendUnavailable:
+                pass
+    for event_id, body in bodies.items():
+        _local_bodies.set(event_id, body)
+    return bodies
+
+
+async def prewarm(redis_client: redis.Redis, db: AsyncSession) -> Tuple[int, int]:
+    """
+    Loads the first PREWARM_LIST_PAGES pages of each pre-warmed listing (at the default
+    page size) and the PREWARM_HOT_EVENTS hottest upcoming events into the cache, so the
+    first reads after a deploy, a flush or before an on-sale do not reach Postgres.
+    One query per listing, one for the hot events and one for all their bodies, then a
+    single pipeline of writes. Returns the number of list pages and events cached.
+    """
+    with cache_breaker.guard():
+        keys = [
+            [await list_key(redis_client, page * PREWARM_PAGE_SIZE, PREWARM_PAGE_SIZE, filters)
+             for page in range(PREWARM_LIST_PAGES)]
+            for filters in PREWARM_LIST_FILTERS
+        ]
+
+    lists = {}
+    for filters, page_keys in zip(PREWARM_LIST_FILTERS, keys):
+        rows = await event_crud.get_events(
+            db, skip=0, limit=PREWARM_LIST_PAGES * PREWARM_PAGE_SIZE, columns=["id"], **filters
+        )
+        event_ids = [row.id for row in rows]
+        for page, key in enumerate(page_keys):
+            lists[key] = event_ids[page * PREWARM_PAGE_SIZE:(page + 1) * PREWARM_PAGE_SIZE]
+    hot_ids = await event_crud.get_hot_event_ids(
+        db, limit=PREWARM_HOT_EVENTS, velocity_minutes=PREWARM_VELOCITY_MINUTES
+    )
+    wanted = {event_id for event_ids in lists.values() for event_id in event_ids} | set(hot_ids)
+    events = await event_crud.get_events_by_ids(db, list(wanted)) if wanted else []
+
+    with cache_breaker.guard():
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key, event_ids in lists.items():
+                pipe.set(key, orjson.dumps(event_ids), ex=EVENT_CACHE_TTL_SECONDS)
+            for event in events:
+                body = dump_json(schemas.Event, event)
+                pipe.set(event_key(event.id), body, ex=EVENT_CACHE_TTL_SECONDS)
+                _local_bodies.set(event.id, body)
+            await pipe.execute()
+    return len(lists), len(events)
+
+
+def validators(body: bytes) -> Tuple[str, Optional[datetime]]:
+    """
+    ETag and Last-Modified of a rendered event, from its id and updated_at.
+    """
+    event = orjson.loads(body)
+    updated_at = event.get("updated_at")
+    return (
+        f'W/"{event["id"]}-{updated_at}"',
+        datetime.fromisoformat(updated_at) if updated_at else None,
+    )
+
+
+async def invalidate(redis_client: redis.Redis, *event_ids: int, lists: bool = False):
+    """
+    Drops the cached bodies of `event_ids`. With `lists`, also retires every cached id
+    list, for changes to which events match a query or their order (new, cancelled,
+    renamed, moved or rescheduled events). If Redis is unavailable the cached copies
+    there expire on their own.
+    """
+    _local_bodies.delete(*event_ids)
+    if lists:
+        _local_ids.clear()
+    try:
+        with cache_breaker.guard():
+            async with redis_client.pipeline(transaction=False) as pipe:
+                if event_ids:
+                    pipe.delete(*(event_key(event_id) for event_id in event_ids))
+                if lists:
+                    pipe.incr(LIST_GENERATION_KEY)
+                await pipe.execute()
+    except BackendUnavailable:
+        logger.warning(f"Could not invalidate cached events {list(event_ids)}; they expire in {EVENT_CACHE_TTL_SECONDS}s.")
@@ -0,0 +1,119 @@
+import csv
+import json
+from typing import AsyncIterator, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.schemas import schemas
+
+# Rows are validated as they arrive and written in batches of this size.
+BULK_EVENT_BATCH_SIZE = settings.BULK_EVENT_BATCH_SIZE
+BULK_EVENT_MAX_ROWS = settings.BULK_EVENT_MAX_ROWS
+
+# (row number, validated row or None, error messages)
+ParsedRow = Tuple[int, Optional[schemas.EventBulkRow], list]
+
+
+def _validate(row_no: int, data) -> ParsedRow:
+    if not isinstance(data, dict):
+        return row_no, None, ["Row must be an object"]
+    try:
+        return row_no, schemas.EventBulkRow.model_validate(data), []
+    except ValidationError as exc:
+        errors = [
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+            for error in exc.errors()
+        ]
+        return row_no, None, errors
+
+
+async def _lines(request: Request) -> AsyncIterator[str]:
+    """
+    Yields the request body line by line as it is received.
+    """
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+async def _ndjson_rows(request: Request) -> AsyncIterator[ParsedRow]:
+    row_no = 0
+    async for line in _lines(request):
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield row_no, None, [f"Invalid JSON: {exc}"]
+            continue
+        yield _validate(row_no, data)
+
+
+async def _csv_rows(request: Request) -> AsyncIterator[ParsedRow]:
+    header = None
+    row_no = 0
+    pending = ""
+    async for line in _lines(request):
+        # A quoted field may span lines; wait until the quotes balance out.
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_no += 1
+        if len(values) != len(header):
+            yield row_no, None, [f"Expected {len(header)} columns, got {len(values)}"]
+            continue
+        # Empty cells mean "not set", e.g. no id or no on_sale_at.
+        yield _validate(row_no, {k: v for k, v in zip(header, values) if v != ""})
+
+
+async def _json_rows(request: Request) -> AsyncIterator[ParsedRow]:
+    try:
+        data = json.loads(await request.body())
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON: {exc}")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array of events")
+    for row_no, item in enumerate(data, start=1):
+        yield _validate(row_no, item)
+
+
+async def parse_rows(request: Request) -> AsyncIterator[ParsedRow]:
+    """
+    Parses an event import by content type: a JSON array, NDJSON (one event per line)
+    or CSV with a header row. NDJSON and CSV are validated while the body streams in.
+    Row numbers are 1-based and exclude the CSV header and blank lines. Yields
+    (row number, validated row or None, error messages).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        rows = _ndjson_rows(request)
+    elif content_type in ("text/csv", "application/csv"):
+        rows = _csv_rows(request)
+    elif content_type in ("application/json", ""):
+        rows = _json_rows(request)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send application/json, application/x-ndjson or text/csv",
+        )
+
+    async for parsed in rows:
+        if parsed[0] > BULK_EVENT_MAX_ROWS:
+            # Earlier batches are already written, so report the cut-off instead of failing.
+            yield parsed[0], None, [f"Import stopped: at most {BULK_EVENT_MAX_ROWS} events per import"]
+            break
+        yield parsed
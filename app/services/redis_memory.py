@@ -0,0 +1,79 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+# Known key families by prefix, most specific first. Anything else is grouped by the
+# part before its first ':'.
+KEY_FAMILIES: List[Tuple[str, str]] = [
+    ("events:ids:", "events:ids:*"),
+    ("event:", "event:*"),
+    ("waitroom:", "waitroom:*"),
+    ("user:", "user:*:bookings"),
+    ("waitlist:", "waitlist:*"),
+    ("profile:", "profile:*"),
+    ("celery-task-meta-", "celery results"),
+    ("_kombu.", "celery broker"),
+    ("unacked", "celery broker"),
+]
+# Queue names are bare keys on the broker.
+CELERY_QUEUES = {"celery"}
+
+
+def key_family(key: str) -> str:
+    for prefix, family in KEY_FAMILIES:
+        if key.startswith(prefix):
+            return family
+    if key in CELERY_QUEUES:
+        return "celery broker"
+    head, sep, _ = key.partition(":")
+    return f"{head}:*" if sep else key
+
+
+def redis_roles() -> Dict[str, List[str]]:
+    """
+    Distinct Redis URLs and the roles each one serves.
+    """
+    roles = defaultdict(list)
+    roles[settings.CACHE_REDIS_URL].append("cache")
+    roles[settings.CELERY_BROKER_URL].append("broker")
+    roles[settings.CELERY_RESULT_BACKEND].append("result_backend")
+    return roles
+
+
+async def memory_report(redis_client: redis.Redis, max_keys: int = settings.REDIS_MEMORY_REPORT_MAX_KEYS) -> dict:
+    """
+    Key count and MEMORY USAGE bytes per key family, from a SCAN of at most `max_keys`
+    keys with the MEMORY USAGE calls pipelined per batch. `truncated` means the totals
+    cover only part of the keyspace.
+    """
+    families = defaultdict(lambda: {"keys": 0, "bytes": 0})
+    scanned = 0
+    cursor = 0
+    while True:
+        cursor, keys = await redis_client.scan(cursor=cursor, count=1000)
+        keys = keys[: max_keys - scanned]
+        if keys:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.memory_usage(key, samples=0)
+                sizes = await pipe.execute()
+            for key, size in zip(keys, sizes):
+                family = families[key_family(key.decode() if isinstance(key, bytes) else key)]
+                family["keys"] += 1
+                family["bytes"] += size or 0
+            scanned += len(keys)
+        if cursor == 0 or scanned >= max_keys:
+            break
+
+    info = await redis_client.info("memory")
+    return {
+        "used_memory_bytes": info.get("used_memory"),
+        "maxmemory_bytes": info.get("maxmemory"),
+        "maxmemory_policy": info.get("maxmemory_policy"),
+        "keys_scanned": scanned,
+        "truncated": cursor != 0,
+        "families": dict(sorted(families.items(), key=lambda item: item[1]["bytes"], reverse=True)),
+    }
@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+import brotli
+import redis.asyncio as redis
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.redis_client import cache_breaker
+from app.core.resilience import BackendUnavailable, LocalCache
+
+# Bodies smaller than this are sent uncompressed.
+COMPRESSION_MIN_BYTES = settings.COMPRESSION_MIN_BYTES
+RESPONSE_CACHE_TTL_SECONDS = settings.RESPONSE_CACHE_TTL_SECONDS
+
+# Preferred first when the client accepts several.
+ENCODINGS = ("br", "gzip")
+
+# Compressed variants made while Redis is unavailable.
+_local_variants = LocalCache(settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_TTL_SECONDS)
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Picks the preferred encoding the client accepts (q > 0), or None for identity.
+    """
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    for encoding in ENCODINGS:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def variant_key(digest: str, encoding: str) -> str:
+    return f"body:{digest}:{encoding}"
+
+
+async def compressed(redis_bytes_client: redis.Redis, body: bytes, digest: str, encoding: str) -> bytes:
+    """
+    `body` in `encoding`, compressed once per distinct body. Variants are cached under
+    the body's hash, so every process shares them, a page assembled again from the same
+    event bodies reuses its variant, and a changed body can never get a stale one.
+    """
+    key = variant_key(digest, encoding)
+    try:
+        with cache_breaker.guard():
+            variant = await redis_bytes_client.get(key)
+    except BackendUnavailable:
+        variant = _local_variants.get(key)
+        if variant is None:
+            variant = compress(body, encoding)
+            _local_variants.set(key, variant)
+        return variant
+    if variant is None:
+        variant = compress(body, encoding)
+        try:
+            with cache_breaker.guard():
+                await redis_bytes_client.set(key, variant, ex=RESPONSE_CACHE_TTL_SECONDS)
+        except BackendUnavailable:
+            pass
+    return variant
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as for GET.
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def render(
+    request: Request,
+    body: bytes,
+    redis_bytes_client: redis.Redis,
+    *,
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+) -> Response:
+    """
+    Builds the response for a rendered JSON body: 304 if the client's copy is current,
+    otherwise the body in the negotiated encoding when it is at least
+    COMPRESSION_MIN_BYTES, from the cached variants. The ETag defaults to a hash of
+    the body.
+    """
+    digest = hashlib.sha1(body).hexdigest()
+    etag = etag or f'"{digest}"'
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    if _not_modified(request, etag, headers.get("Last-Modified")):
+        return Response(status_code=304, headers=headers)
+
+    encoding = negotiate(request.headers.get("accept-encoding", ""))
+    if encoding and len(body) >= COMPRESSION_MIN_BYTES:
+        body = await compressed(redis_bytes_client, body, digest, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
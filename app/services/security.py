@@ -1,13 +1,11 @@
-import os
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from dotenv import load_dotenv
 import bcrypt
 bcrypt.__about__ = bcrypt
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 
-load_dotenv()
+from app.core.config import settings
 
 # --- Password Hashing ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -19,9 +17,9 @@ def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 # --- JWT Token Handling ---
-SECRET_KEY = os.getenv("SECRET_KEY", "a_very_secret_key_that_should_be_in_env")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+SECRET_KEY = settings.SECRET_KEY
+ALGORITHM = settings.ALGORITHM
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
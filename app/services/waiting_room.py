@@ -0,0 +1,200 @@
+import math
+import time
+import logging
+import secrets
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import HTTPException, status
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.redis_client import waiting_room_breaker
+from app.core.resilience import BackendUnavailable
+
+logger = logging.getLogger(__name__)
+
+# --- Waiting Room Settings ---
+# Admissions are a pure function of time since the on-sale: BURST at the start, then
+# ADMIT_PER_SECOND. No background job is needed to move the queue forward.
+WAITING_ROOM_ADMIT_PER_SECOND = settings.WAITING_ROOM_ADMIT_PER_SECOND
+WAITING_ROOM_BURST = settings.WAITING_ROOM_BURST
+# How long after the on-sale start the waiting room stays in front of the booking pipeline.
+WAITING_ROOM_WINDOW_SECONDS = settings.WAITING_ROOM_WINDOW_SECONDS
+# Booking and hold requests an admitted token is good for, so admissions meter the
+# requests that reach the backend and not just how fast users get through the door.
+WAITING_ROOM_TOKEN_USES = settings.WAITING_ROOM_TOKEN_USES
+
+# Hands out the user's token, creating it and its queue number on first join. The user's
+# token and the token's entry are written together, so a concurrent join can never see
+# one without the other.
+# KEYS: users, tokens, seq. ARGV: user id, candidate token, closes_at.
+_JOIN_SCRIPT = """
+local token = redis.call('HGET', KEYS[1], ARGV[1])
+if token then return token end
+local number = redis.call('INCR', KEYS[3])
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[2], ARGV[2], number .. ':' .. ARGV[1])
+for i = 1, 3 do
+    redis.call('EXPIREAT', KEYS[i], ARGV[3])
+end
+return ARGV[2]
+"""
+
+
+def _meta_key(event_id: int) -> str:
+    return f"waitroom:{event_id}:meta"
+
+def _seq_key(event_id: int) -> str:
+    return f"waitroom:{event_id}:seq"
+
+def _tokens_key(event_id: int) -> str:
+    return f"waitroom:{event_id}:tokens"
+
+def _users_key(event_id: int) -> str:
+    return f"waitroom:{event_id}:users"
+
+def _uses_key(event_id: int) -> str:
+    return f"waitroom:{event_id}:uses"
+
+
+async def publish_on_sale(redis_client: redis.Redis, event_id: int, on_sale_at: Optional[datetime]):
+    """
+    Opens (or removes) the waiting room for an event. All keys expire once the
+    waiting room window after the on-sale start has passed. Called after the event is
+    committed, so a Redis failure is logged instead of failing the request.
+    """
+    try:
+        with waiting_room_breaker.guard():
+            await _publish_on_sale(redis_client, event_id, on_sale_at)
+    except BackendUnavailable:
+        logger.error(f"Could not publish the waiting room of event {event_id}; update the event again to retry.")
+
+
+async def _publish_on_sale(redis_client: redis.Redis, event_id: int, on_sale_at: Optional[datetime]):
+    if on_sale_at is None:
+        await redis_client.delete(_meta_key(event_id))
+        return
+
+    if on_sale_at.tzinfo is None:
+        on_sale_at = on_sale_at.replace(tzinfo=timezone.utc)
+    on_sale_ts = on_sale_at.timestamp()
+    closes_at = int(on_sale_ts + WAITING_ROOM_WINDOW_SECONDS)
+    if closes_at <= time.time():
+        await redis_client.delete(_meta_key(event_id))
+        return
+
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(_meta_key(event_id), mapping={
+            "on_sale_at": on_sale_ts,
+            "rate": WAITING_ROOM_ADMIT_PER_SECOND,
+            "burst": WAITING_ROOM_BURST,
+            "closes_at": closes_at,
+        })
+        for key in (
+            _meta_key(event_id), _seq_key(event_id), _tokens_key(event_id), _users_key(event_id), _uses_key(event_id)
+        ):
+            pipe.expireat(key, closes_at)
+        await pipe.execute()
+
+
+def _admitted_upto(meta: dict, now: float) -> int:
+    elapsed = now - float(meta["on_sale_at"])
+    if elapsed < 0:
+        return 0
+    return int(meta["burst"]) + int(elapsed * float(meta["rate"]))
+
+
+def _status(meta: dict, number: int, now: float) -> dict:
+    admitted_upto = _admitted_upto(meta, now)
+    position = max(number - admitted_upto, 0)
+    on_sale_at = float(meta["on_sale_at"])
+    rate = float(meta["rate"])
+    if position == 0:
+        eta_seconds = max(on_sale_at - now, 0)
+    else:
+        # Time until admitted_upto reaches this number.
+        needed = number - int(meta["burst"])
+        eta_seconds = max(on_sale_at + math.ceil(needed / rate) - now, 0) if rate > 0 else None
+    return {
+        "position": position,
+        "admitted": position == 0 and now >= on_sale_at,
+        "eta_seconds": round(eta_seconds, 1) if eta_seconds is not None else None,
+    }
+
+
+async def join(redis_client: redis.Redis, event_id: int, user_id: int) -> Optional[dict]:
+    """
+    Gives the user a place in the event's waiting room, or returns None if the event
+    has no active waiting room. Joining again returns the same token and place.
+    """
+    meta = await redis_client.hgetall(_meta_key(event_id))
+    if not meta:
+        return None
+
+    join_script = redis_client.register_script(_JOIN_SCRIPT)
+    token = await join_script(
+        keys=[_users_key(event_id), _tokens_key(event_id), _seq_key(event_id)],
+        args=[user_id, secrets.token_urlsafe(16), int(meta["closes_at"])],
+    )
+    return await position(redis_client, event_id, token)
+
+
+async def position(redis_client: redis.Redis, event_id: int, token: str) -> Optional[dict]:
+    """
+    Current place in line for a queue token, computed from two Redis reads.
+    Returns None if the waiting room or the token is unknown.
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hgetall(_meta_key(event_id))
+        pipe.hget(_tokens_key(event_id), token)
+        meta, entry = await pipe.execute()
+    if not meta or not entry:
+        return None
+
+    number, _ = entry.split(":", 1)
+    return {"token": token, **_status(meta, int(number), time.time())}
+
+
+async def check_admission(redis_client: redis.Redis, event_id: int, user_id: int, token: Optional[str]):
+    """
+    Lets a booking request through if the event has no active waiting room, or if the
+    user's queue token has been admitted and has uses left; each request that gets
+    through uses the token once. Otherwise raises 403/429. Admission cannot be checked
+    while Redis is unavailable, so the request fails with BackendUnavailable.
+    """
+    with waiting_room_breaker.guard():
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(_meta_key(event_id))
+            pipe.hget(_tokens_key(event_id), token or "")
+            meta, entry = await pipe.execute()
+    if not meta:
+        return
+
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This on-sale uses a waiting room. Join the queue first.",
+        )
+    number, token_user_id = entry.split(":", 1)
+    if int(token_user_id) != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Queue token belongs to another user.")
+
+    queue_status = _status(meta, int(number), time.time())
+    if not queue_status["admitted"]:
+        retry_after = max(int(math.ceil(queue_status["eta_seconds"] or 1)), 1)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={"message": "You are still in the waiting room.", **queue_status},
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    with waiting_room_breaker.guard():
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(_uses_key(event_id), token, 1)
+            pipe.expireat(_uses_key(event_id), int(meta["closes_at"]))
+            uses, _ = await pipe.execute()
+    if uses > WAITING_ROOM_TOKEN_USES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This queue token has already been used for this on-sale.",
+        )
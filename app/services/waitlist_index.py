@@ -0,0 +1,290 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import cache_breaker
+from app.core.resilience import BackendUnavailable
+from app.crud import waitlist as waitlist_crud
+
+logger = logging.getLogger(__name__)
+
+WAITLIST_INDEX_TTL_SECONDS = settings.WAITLIST_INDEX_TTL_SECONDS
+# Marks a loaded mirror, so an event without pending entries is mirrored too.
+LOADED_FIELD = "_"
+_EPOCH = datetime(1970, 1, 1)
+
+# Each event's mirror is a sorted set of its pending entries in promotion order, a hash
+# of entry -> "slot:tickets" and user -> entry, and a Fenwick tree (binary indexed tree)
+# of the tickets per slot. Slots increase in waitlist order, so the tickets ahead of an
+# entry are the tree's sum of the slots before its own. The tree is a hash of partial
+# sums: adding a slot or summing up to one touches at most 33 fields, however long the
+# waitlist is.
+_FENWICK = """
+local SLOTS = 4294967296
+local function lowbit(i)
+    local bit = 1
+    while i % (bit * 2) == 0 do bit = bit * 2 end
+    return bit
+end
+local function fenwick_add(key, slot, delta)
+    while slot <= SLOTS do
+        redis.call('HINCRBY', key, slot, delta)
+        slot = slot + lowbit(slot)
+    end
+end
+local function fenwick_sum(key, slot)
+    local sum = 0
+    while slot > 0 do
+        sum = sum + tonumber(redis.call('HGET', key, slot) or 0)
+        slot = slot - lowbit(slot)
+    end
+    return sum
+end
+local function entry(entries, member)
+    local slot, tickets = string.match(redis.call('HGET', entries, member), '^(%d+):(%d+)$')
+    return tonumber(slot), tonumber(tickets)
+end
+"""
+
+# Adds (ARGV[2] == "add") or removes users from a loaded mirror; never creates a partial
+# one. Always bumps the version so a concurrent rebuild that read the database before
+# this write does not install its stale snapshot. A new entry normally lands at the end
+# and takes the next slot; one that lands earlier (e.g. two joins committed out of order)
+# re-slots itself and the few entries behind it.
+# KEYS: ranks, entries, sums, version. ARGV: ttl, op, then (entry, score, tickets,
+# user id) quadruples for "add" or user ids for "remove".
+_WRITE_SCRIPT = _FENWICK + """
+redis.call('INCR', KEYS[4])
+redis.call('EXPIRE', KEYS[4], ARGV[1])
+if redis.call('EXISTS', KEYS[2]) == 0 then return 0 end
+if ARGV[2] == 'add' then
+    for i = 3, #ARGV, 4 do
+        local member, user = ARGV[i], 'u' .. ARGV[i + 3]
+        if redis.call('HEXISTS', KEYS[2], user) == 0 then
+            redis.call('ZADD', KEYS[1], ARGV[i + 1], member)
+            redis.call('HSET', KEYS[2], member, '0:' .. ARGV[i + 2], user, member)
+            local rank = redis.call('ZRANK', KEYS[1], member)
+            for _, behind in ipairs(redis.call('ZRANGE', KEYS[1], rank, -1)) do
+                local slot, tickets = entry(KEYS[2], behind)
+                if slot > 0 then fenwick_add(KEYS[3], slot, -tickets) end
+                slot = redis.call('HINCRBY', KEYS[3], 'n', 1)
+                redis.call('HSET', KEYS[2], behind, slot .. ':' .. tickets)
+                fenwick_add(KEYS[3], slot, tickets)
+            end
+        end
+    end
+else
+    for i = 3, #ARGV do
+        local user = 'u' .. ARGV[i]
+        local member = redis.call('HGET', KEYS[2], user)
+        if member then
+            local slot, tickets = entry(KEYS[2], member)
+            fenwick_add(KEYS[3], slot, -tickets)
+            redis.call('ZREM', KEYS[1], member)
+            redis.call('HDEL', KEYS[2], member, user)
+        end
+    end
+end
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[1])
+end
+return 1
+"""
+
+# Replaces an event's mirror with a snapshot read at version ARGV[1], building the tree
+# in one pass instead of one add per entry.
+# KEYS: ranks, entries, sums, version. ARGV: version, ttl, then (entry, score, tickets,
+# user id) quadruples in waitlist order.
+_INSTALL_SCRIPT = _FENWICK + """
+if (redis.call('GET', KEYS[4]) or '') ~= ARGV[1] then return 0 end
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+redis.call('HSET', KEYS[2], '""" + LOADED_FIELD + """', '')
+local tree, n = {}, 0
+for i = 3, #ARGV, 4 do
+    n = n + 1
+    tree[n] = tonumber(ARGV[i + 2])
+    redis.call('ZADD', KEYS[1], ARGV[i + 1], ARGV[i])
+    redis.call('HSET', KEYS[2], ARGV[i], n .. ':' .. ARGV[i + 2], 'u' .. ARGV[i + 3], ARGV[i])
+end
+-- Each node passes its sum on to its parent; parents past the last slot are finished
+-- in ascending order, once all their children have reported.
+local above, done = {}, {}
+for i = 1, n do
+    local parent = i + lowbit(i)
+    if parent <= n then
+        tree[parent] = tree[parent] + tree[i]
+    elseif parent <= SLOTS then
+        above[parent] = (above[parent] or 0) + tree[i]
+    end
+end
+while true do
+    local node = nil
+    for candidate in pairs(above) do
+        if not done[candidate] and (node == nil or candidate < node) then node = candidate end
+    end
+    if node == nil then break end
+    done[node] = true
+    tree[node] = above[node]
+    local parent = node + lowbit(node)
+    if parent <= SLOTS then above[parent] = (above[parent] or 0) + above[node] end
+end
+for node, sum in pairs(tree) do
+    redis.call('HSET', KEYS[3], node, sum)
+end
+redis.call('HSET', KEYS[3], 'n', n)
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[2])
+end
+return 1
+"""
+
+# Rank and tickets ahead, both in O(log n).
+# KEYS: ranks, entries, sums. ARGV: user id. Returns nil if the mirror is not loaded.
+_POSITION_SCRIPT = _FENWICK + """
+if redis.call('EXISTS', KEYS[2]) == 0 then return false end
+local member = redis.call('HGET', KEYS[2], 'u' .. ARGV[1])
+if not member then return {-1, 0, 0} end
+local slot, tickets = entry(KEYS[2], member)
+return {redis.call('ZRANK', KEYS[1], member), fenwick_sum(KEYS[3], slot - 1), tickets}
+"""
+
+
+def _keys(event_id: int) -> List[str]:
+    return [
+        f"waitlist:{event_id}",
+        f"waitlist:{event_id}:entries",
+        f"waitlist:{event_id}:sums",
+        f"waitlist:{event_id}:version",
+    ]
+
+
+def _args(entry) -> list:
+    """
+    An entry as (member, score, tickets, user id). The score is created_at (naive UTC)
+    in whole microseconds, which a float timestamp cannot hold exactly, and the member
+    is the zero-padded entry id, so entries created in the same microsecond rank by id
+    just as get_pending_entries orders them.
+    """
+    score = (entry.created_at - _EPOCH) // timedelta(microseconds=1)
+    return [f"{entry.id:012d}", score, entry.tickets_requested, entry.user_id]
+
+
+def _position(event_id: int, rank: int, tickets_ahead: int, tickets_requested: int) -> dict:
+    return {
+        "event_id": event_id,
+        "position": rank + 1,
+        "entries_ahead": rank,
+        "tickets_ahead": tickets_ahead,
+        "tickets_requested": tickets_requested,
+    }
+
+
+async def _write(redis_client: redis.Redis, op: str, args_by_event: dict):
+    """
+    Skipped while Redis is unavailable, so a mirror loaded before the outage stays stale
+    until it expires.
+    """
+    write = redis_client.register_script(_WRITE_SCRIPT)
+    try:
+        with cache_breaker.guard():
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for event_id, args in args_by_event.items():
+                    await write(
+                        keys=_keys(event_id),
+                        args=[WAITLIST_INDEX_TTL_SECONDS, op, *args],
+                        client=pipe,
+                    )
+                await pipe.execute()
+    except BackendUnavailable:
+        logger.warning(f"Could not update the waitlist mirrors of events {list(args_by_event)}.")
+
+
+async def add(redis_client: redis.Redis, entries: Iterable):
+    """
+    Mirrors new pending waitlist entries. Re-adding an entry keeps its place.
+    Call after the commit.
+    """
+    args_by_event = defaultdict(list)
+    for entry in entries:
+        args_by_event[entry.event_id] += _args(entry)
+    if args_by_event:
+        await _write(redis_client, "add", args_by_event)
+
+
+async def remove(redis_client: redis.Redis, items: Iterable):
+    """
+    Drops users from their events' mirrors. `items` are fulfilled or cancelled waitlist
+    entries, or the bookings entries were promoted to. Call after the commit.
+    """
+    args_by_event = defaultdict(list)
+    for item in items:
+        args_by_event[item.event_id].append(item.user_id)
+    if args_by_event:
+        await _write(redis_client, "remove", args_by_event)
+
+
+async def drop(redis_client: redis.Redis, event_id: int):
+    """
+    Forgets an event's mirror, e.g. after its whole waitlist was cancelled.
+    """
+    ranks_key, entries_key, sums_key, version_key = _keys(event_id)
+    try:
+        with cache_breaker.guard():
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(ranks_key, entries_key, sums_key)
+                pipe.incr(version_key)
+                pipe.expire(version_key, WAITLIST_INDEX_TTL_SECONDS)
+                await pipe.execute()
+    except BackendUnavailable:
+        logger.warning(f"Could not drop the waitlist mirror of event {event_id}.")
+
+
+async def get_position(
+    redis_client: redis.Redis, db: AsyncSession, event_id: int, user_id: int
+) -> Optional[dict]:
+    """
+    A user's place in an event's waitlist, from the Redis mirror in one round trip.
+    On a miss the mirror is rebuilt from one query over the pending entries and
+    installed unless the waitlist changed in the meantime. Returns None if the user
+    is not waiting. While Redis is unavailable the position is computed from the query.
+    """
+    ranks_key, entries_key, sums_key, version_key = _keys(event_id)
+    position = redis_client.register_script(_POSITION_SCRIPT)
+    redis_available = True
+    try:
+        with cache_breaker.guard():
+            found = await position(keys=[ranks_key, entries_key, sums_key], args=[user_id])
+            if found is not None:
+                rank, tickets_ahead, tickets_requested = found
+                return _position(event_id, rank, tickets_ahead, tickets_requested) if rank >= 0 else None
+            # Read before the database, so any write committed after the query bumps it.
+            version = await redis_client.get(version_key)
+    except BackendUnavailable:
+        redis_available = False
+
+    entries = await waitlist_crud.get_pending_entries(db, event_id=event_id)
+    if redis_available:
+        args = []
+        for entry in entries:
+            args += _args(entry)
+        install = redis_client.register_script(_INSTALL_SCRIPT)
+        try:
+            with cache_breaker.guard():
+                await install(
+                    keys=[ranks_key, entries_key, sums_key, version_key],
+                    args=[version or "", WAITLIST_INDEX_TTL_SECONDS, *args],
+                )
+        except BackendUnavailable:
+            pass
+
+    tickets_ahead = 0
+    for rank, entry in enumerate(entries):
+        if entry.user_id == user_id:
+            return _position(event_id, rank, tickets_ahead, entry.tickets_requested)
+        tickets_ahead += entry.tickets_requested
+    return None
@@ -1,16 +1,17 @@
 from celery import Celery
-import os
-from dotenv import load_dotenv
 import ssl
 
-load_dotenv()
+from app.core.config import settings
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+SEAT_SHARD_FOLD_SECONDS = settings.SEAT_SHARD_FOLD_SECONDS
+HOLD_REAPER_SECONDS = settings.HOLD_REAPER_SECONDS
+ARCHIVE_SECONDS = settings.ARCHIVE_SECONDS
+PREWARM_SECONDS = settings.PREWARM_SECONDS
 
 celery_app = Celery(
     "tasks",
-    broker=REDIS_URL,
-    backend=REDIS_URL,
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
     include=["app.workers.tasks"]
 )
 
@@ -20,5 +21,31 @@ celery_app.conf.update(
     },
     redis_backend_use_ssl = {
         'ssl_cert_reqs': ssl.CERT_REQUIRED
+    },
+    # Bounds how long publishing from the API can block on an unreachable broker.
+    broker_transport_options = {
+        'socket_timeout': settings.BROKER_SOCKET_TIMEOUT_SECONDS,
+        'socket_connect_timeout': settings.BROKER_CONNECT_TIMEOUT_SECONDS,
+    },
+    # Every task is fire-and-forget; nothing reads results, so none are stored by default.
+    task_ignore_result = True,
+    result_expires = settings.CELERY_RESULT_EXPIRES_SECONDS,
+    beat_schedule = {
+        'fold-seat-shards': {
+            'task': 'fold_seat_shards',
+            'schedule': SEAT_SHARD_FOLD_SECONDS,
+        },
+        'reap-expired-holds': {
+            'task': 'reap_expired_holds',
+            'schedule': HOLD_REAPER_SECONDS,
+        },
+        'archive-past-events': {
+            'task': 'archive_past_events',
+            'schedule': ARCHIVE_SECONDS,
+        },
+        'prewarm-caches': {
+            'task': 'prewarm_caches',
+            'schedule': PREWARM_SECONDS,
+        },
     }
 )
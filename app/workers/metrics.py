@@ -0,0 +1,188 @@
+import os
+import time
+import socket
+import logging
+import threading
+
+from celery import signals
+
+# Settings load .env first: prometheus_client decides on multiprocess mode from
+# PROMETHEUS_MULTIPROC_DIR when it is imported, and the directory has to exist by then.
+from app.core.config import settings
+
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    multiprocess,
+    push_to_gateway,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+WORKER_METRICS_PORT = settings.WORKER_METRICS_PORT
+PUSHGATEWAY_URL = settings.PUSHGATEWAY_URL
+PUSHGATEWAY_INTERVAL_SECONDS = settings.PUSHGATEWAY_INTERVAL_SECONDS
+METRICS_QUEUES = settings.METRICS_QUEUES
+PROMETHEUS_MULTIPROC_DIR = settings.PROMETHEUS_MULTIPROC_DIR
+
+# --- Metric definitions ---
+TASK_QUEUE_LATENCY = Histogram(
+    "evently_task_queue_latency_seconds",
+    "Time between a task being published and a worker starting it.",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+TASK_EXECUTION_TIME = Histogram(
+    "evently_task_execution_seconds",
+    "Time spent executing a task on the worker.",
+    ["task", "state"],
+)
+SEAT_CLAIM_TIME = Histogram(
+    "evently_seat_claim_seconds",
+    "Time to claim seats with the conditional UPDATE ... RETURNING on an events row or "
+    "seat shard, including any wait for its row lock.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+BOOKING_OUTCOMES = Counter(
+    "evently_booking_outcomes_total",
+    "Booking requests processed by the worker, by outcome.",
+    ["outcome"],
+)
+
+_task_started_at = {}
+
+
+# --- Celery signal hooks ---
+@signals.before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    """
+    Records the publish time on the message so the worker can compute queue latency.
+    """
+    if headers is not None:
+        headers.setdefault("enqueued_at", time.time())
+
+
+@signals.task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    _task_started_at[task_id] = time.perf_counter()
+
+    enqueued_at = getattr(task.request, "enqueued_at", None)
+    if enqueued_at is None:
+        enqueued_at = (getattr(task.request, "headers", None) or {}).get("enqueued_at")
+    if enqueued_at is not None:
+        TASK_QUEUE_LATENCY.labels(task=task.name).observe(max(time.time() - float(enqueued_at), 0))
+
+
+@signals.task_postrun.connect
+def record_task_end(task_id=None, task=None, state=None, **kwargs):
+    started_at = _task_started_at.pop(task_id, None)
+    if started_at is not None:
+        TASK_EXECUTION_TIME.labels(task=task.name, state=state or "UNKNOWN").observe(
+            time.perf_counter() - started_at
+        )
+
+
+# --- Broker queue depth ---
+class QueueDepthCollector:
+    """
+    Reads the broker queue lengths at scrape time, so the value is never stale.
+    """
+
+    def __init__(self, app, queues):
+        self.app = app
+        self.queues = queues
+
+    def collect(self):
+        gauge = GaugeMetricFamily(
+            "evently_broker_queue_depth",
+            "Messages waiting in the broker, per queue.",
+            labels=["queue"],
+        )
+        try:
+            with self.app.connection_for_read() as conn:
+                channel = conn.default_channel
+                for queue in self.queues:
+                    _, message_count, _ = channel.queue_declare(queue=queue, passive=True)
+                    gauge.add_metric([queue], message_count)
+        except Exception:
+            logger.exception("Could not read broker queue depth.")
+        yield gauge
+
+
+def _build_registry(app) -> CollectorRegistry:
+    if PROMETHEUS_MULTIPROC_DIR:
+        # Prefork children write to the shared directory; aggregate them here.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    registry.register(QueueDepthCollector(app, METRICS_QUEUES))
+    return registry
+
+
+@signals.worker_init.connect
+def clear_multiprocess_dir(**kwargs):
+    """
+    Removes the previous run's metric files before the pool starts, so counters of dead
+    processes are not reported again.
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return
+    for name in os.listdir(PROMETHEUS_MULTIPROC_DIR):
+        if name.endswith(".db"):
+            os.remove(os.path.join(PROMETHEUS_MULTIPROC_DIR, name))
+
+
+@signals.worker_process_shutdown.connect
+def mark_process_dead(**kwargs):
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+@signals.worker_ready.connect
+def start_metrics_server(sender=None, **kwargs):
+    """
+    Exposes worker metrics over HTTP from the main worker process. Tasks run in the pool
+    processes, so with the prefork pool their metrics are only served if they share
+    PROMETHEUS_MULTIPROC_DIR.
+    """
+    if not WORKER_METRICS_PORT:
+        return
+    if not PROMETHEUS_MULTIPROC_DIR:
+        logger.warning(
+            "PROMETHEUS_MULTIPROC_DIR is not set; task metrics recorded in prefork pool "
+            "processes will not be served."
+        )
+    registry = _build_registry(sender.app)
+    start_http_server(int(WORKER_METRICS_PORT), registry=registry)
+    logger.info(f"Worker metrics server listening on port {WORKER_METRICS_PORT}.")
+
+
+@signals.worker_process_init.connect
+def start_pushgateway_loop(**kwargs):
+    """
+    Periodically pushes this pool process's metrics to a Pushgateway, if configured.
+    """
+    if not PUSHGATEWAY_URL:
+        return
+
+    grouping_key = {"instance": f"{socket.gethostname()}-{os.getpid()}"}
+
+    def push_forever():
+        while True:
+            time.sleep(PUSHGATEWAY_INTERVAL_SECONDS)
+            try:
+                push_to_gateway(
+                    PUSHGATEWAY_URL, job="evently-worker", registry=REGISTRY, grouping_key=grouping_key
+                )
+            except Exception:
+                logger.exception("Failed to push worker metrics to the Pushgateway.")
+
+    threading.Thread(target=push_forever, name="metrics-push", daemon=True).start()
@@ -0,0 +1,21 @@
+import redis
+from kombu.exceptions import OperationalError
+
+from app.core.resilience import BackendUnavailable, CircuitBreaker
+
+# Publishing blocks the caller, so a broker outage should fail fast instead of stalling
+# every request that enqueues work.
+broker_breaker = CircuitBreaker("Task broker", errors=(OperationalError, redis.RedisError, OSError))
+
+
+def enqueue(task_name: str, **kwargs):
+    """
+    Sends a task by its registered name. The API only needs the Celery app to publish,
+    so it never imports app.workers.tasks and its worker-only dependencies.
+    Raises BackendUnavailable if the broker is down; the task is not sent.
+    Celery is imported on first use, keeping it out of the API's import time.
+    """
+    from app.workers.celery_app import celery_app
+
+    with broker_breaker.guard():
+        return celery_app.send_task(task_name, kwargs=kwargs, retry=False)
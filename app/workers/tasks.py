@@ -1,28 +1,73 @@
 import asyncio
 import logging
-import os
-from dotenv import load_dotenv
 import sib_api_v3_sdk
 from sib_api_v3_sdk.rest import ApiException
 
+from app.core.config import settings
 from app.workers.celery_app import celery_app
-from app.db.session import AsyncSessionLocal
+from app.workers import metrics
+from app.db.session import WorkerSessionLocal
 from app.crud import booking as booking_crud
+from app.crud import seat_shard as seat_shard_crud
+from app.crud import hold as hold_crud
+from app.crud import archive as archive_crud
 from app.schemas import schemas
+from app.core.redis_client import new_redis_client
+from app.services import availability, booking_cache, waitlist_index, event_cache
+from app.models import models
 
-load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-logger.info(f"CELERY WORKER DATABASE_URL: {os.getenv('DATABASE_URL')}")
-
-
 brevo_configuration = sib_api_v3_sdk.Configuration()
-brevo_configuration.api_key['api-key'] = os.getenv('BREVO_API_KEY')
+brevo_configuration.api_key['api-key'] = settings.BREVO_API_KEY
 brevo_api_client = sib_api_v3_sdk.ApiClient(brevo_configuration)
 brevo_emails_api = sib_api_v3_sdk.TransactionalEmailsApi(brevo_api_client)
 
-@celery_app.task(name="process_booking")
+async def publish_bookings(bookings: list):
+    """
+    Publishes the seat changes of new bookings to the live availability feed and writes
+    them through to their users' cached booking histories.
+    Unsharded bookings carry their updated event; sharded ones only know the delta.
+    """
+    redis_client = new_redis_client()
+    try:
+        await booking_cache.record(redis_client, bookings)
+        for booking in bookings:
+            if booking.seat_shard is None:
+                await availability.publish_event_state(redis_client, booking.event)
+            else:
+                await availability.publish_seat_change(
+                    redis_client, booking.event_id, delta=booking.tickets_booked
+                )
+    finally:
+        await redis_client.aclose()
+
+async def index_waitlist_entries(entries: list):
+    """
+    Mirrors new waitlist entries into the Redis index behind the waitlist position endpoint.
+    """
+    redis_client = new_redis_client()
+    try:
+        await waitlist_index.add(redis_client, entries)
+    finally:
+        await redis_client.aclose()
+
+async def publish_results(bookings: list, entries: list, request: str):
+    """
+    Writes committed bookings and waitlist entries through to the caches and the waitlist
+    index. The database already holds the outcome, so a failure here is only logged and
+    never turns a processed request into a failed one.
+    """
+    try:
+        if bookings:
+            await publish_bookings(bookings)
+        if entries:
+            await index_waitlist_entries(entries)
+    except Exception:
+        logger.warning(f"Processed {request}, but could not update the caches.", exc_info=True)
+
+@celery_app.task(name="process_booking", ignore_result=True)
 def process_booking_task(booking_data: dict, user_id: int):
     """
     Celery task to process a booking request.
@@ -30,20 +75,151 @@ def process_booking_task(booking_data: dict, user_id: int):
     logger.info(f"Received booking request for user {user_id}. Booking data: {booking_data}")
     
     async def run_booking_logic():
-        async with AsyncSessionLocal() as db:
+        async with WorkerSessionLocal() as db:
             try:
                 booking_schema = schemas.BookingCreate(**booking_data)
-                await booking_crud.create_booking(
+                result = await booking_crud.create_booking(
                     db=db, booking=booking_schema, user_id=user_id
                 )
-                logger.info(f"Successfully processed booking for user {user_id} and event {booking_data.get('event_id')}.")
-            except Exception as e:
+            except Exception:
+                metrics.BOOKING_OUTCOMES.labels(outcome="failed").inc()
                 logger.exception(f"Booking/waitlist request failed for user {user_id} and event {booking_data.get('event_id')}.")
                 raise
+
+        outcome = "booked" if isinstance(result, models.Booking) else "waitlisted"
+        metrics.BOOKING_OUTCOMES.labels(outcome=outcome).inc()
+        logger.info(f"Successfully processed booking for user {user_id} and event {booking_data.get('event_id')}.")
+        await publish_results(
+            [result] if outcome == "booked" else [],
+            [result] if outcome == "waitlisted" else [],
+            f"the booking request of user {user_id}",
+        )
     
     asyncio.run(run_booking_logic())
 
-@celery_app.task(name="send_waitlist_success_email")
+@celery_app.task(name="process_cart_booking", ignore_result=True)
+def process_cart_booking_task(cart_data: dict, user_id: int):
+    """
+    Celery task to book every line of a cart in one transaction.
+    """
+    logger.info(f"Received cart booking request for user {user_id}. Cart data: {cart_data}")
+
+    async def run_cart_logic():
+        async with WorkerSessionLocal() as db:
+            try:
+                cart = schemas.CartBookingCreate(**cart_data)
+                results = await booking_crud.create_cart_booking(db=db, cart=cart, user_id=user_id)
+            except Exception:
+                metrics.BOOKING_OUTCOMES.labels(outcome="failed").inc()
+                logger.exception(f"Cart booking request failed for user {user_id}.")
+                raise
+
+        bookings = []
+        for event_id, result in results:
+            if isinstance(result, models.Booking):
+                outcome = "booked"
+                bookings.append(result)
+            elif isinstance(result, models.WaitlistEntry):
+                outcome = "waitlisted"
+            else:
+                outcome = "skipped"
+            metrics.BOOKING_OUTCOMES.labels(outcome=outcome).inc()
+        logger.info(f"Successfully processed cart booking for user {user_id}: {len(bookings)} of {len(results)} events booked.")
+        entries = [result for _, result in results if isinstance(result, models.WaitlistEntry)]
+        await publish_results(bookings, entries, f"the cart booking request of user {user_id}")
+
+    asyncio.run(run_cart_logic())
+
+@celery_app.task(name="fold_seat_shards", ignore_result=True)
+def fold_seat_shards_task():
+    """
+    Periodic task that folds sharded seat counters back into events.booked_seats
+    and rebalances drained shards.
+    """
+    async def run_fold():
+        async with WorkerSessionLocal() as db:
+            folded = await seat_shard_crud.fold_seat_shards(db)
+        if folded:
+            redis_client = new_redis_client()
+            try:
+                for row in folded:
+                    await availability.publish_seat_change(
+                        redis_client, row.id, booked_seats=row.booked_seats, capacity=row.capacity
+                    )
+            finally:
+                await redis_client.aclose()
+            logger.info(f"Folded seat shards for {len(folded)} events.")
+
+    asyncio.run(run_fold())
+
+@celery_app.task(name="reap_expired_holds", ignore_result=True)
+def reap_expired_holds_task():
+    """
+    Periodic task that returns the seats of expired holds to inventory in batches
+    and promotes the affected waitlists.
+    """
+    async def run_reaper():
+        async with WorkerSessionLocal() as db:
+            total, touched, promoted = 0, {}, []
+            while True:
+                expired, events, bookings = await hold_crud.reap_expired_holds(db)
+                total += expired
+                touched.update((event.id, event) for event in events)
+                promoted.extend(bookings)
+                if expired < hold_crud.HOLD_REAPER_BATCH_SIZE:
+                    break
+        if total:
+            redis_client = new_redis_client()
+            try:
+                for event in touched.values():
+                    await availability.publish_event_state(redis_client, event)
+                await booking_cache.record(redis_client, promoted)
+                await waitlist_index.remove(redis_client, promoted)
+            finally:
+                await redis_client.aclose()
+            logger.info(f"Expired {total} seat holds.")
+
+    asyncio.run(run_reaper())
+
+@celery_app.task(name="archive_past_events", ignore_result=True)
+def archive_past_events_task():
+    """
+    Periodic task that moves the bookings and waitlists of long-past events into the
+    archive partitions, batch by batch, keeping the hot tables and their indexes small.
+    """
+    async def run_archival():
+        async with WorkerSessionLocal() as db:
+            events = bookings = waitlist = 0
+            while True:
+                batch_events, batch_bookings, batch_waitlist = await archive_crud.archive_past_events(db)
+                events += batch_events
+                bookings += batch_bookings
+                waitlist += batch_waitlist
+                if batch_events < archive_crud.ARCHIVE_BATCH_EVENTS:
+                    break
+        if events:
+            logger.info(f"Archived {bookings} bookings and {waitlist} waitlist entries of {events} past events.")
+
+    asyncio.run(run_archival())
+
+@celery_app.task(name="prewarm_caches", ignore_result=True)
+def prewarm_caches_task():
+    """
+    Periodic task that reloads the first event list pages and the hottest upcoming
+    events into the cache before their entries expire.
+    """
+    async def run_prewarm():
+        redis_client = new_redis_client()
+        try:
+            async with WorkerSessionLocal() as db:
+                pages, events = await event_cache.prewarm(redis_client, db)
+        finally:
+            await redis_client.aclose()
+        logger.info(f"Pre-warmed {pages} event list pages and {events} events.")
+
+    asyncio.run(run_prewarm())
+
+@celery_app.task(name="send_waitlist_success_email", ignore_result=True)
 def send_waitlist_success_email(user_email: str, user_name: str, event_name: str):
     """
     Sends a confirmation email using the pre-configured Brevo client to a user 
@@ -57,7 +233,7 @@ def send_waitlist_success_email(user_email: str, user_name: str, event_name: str
     <p>Thank you,</p>
     <p>The Evently Team</p>
     """
-    sender = {"name": "Evently", "email": os.getenv("SENDER_EMAIL")}
+    sender = {"name": "Evently", "email": settings.SENDER_EMAIL}
     to = [{"email": user_email, "name": user_name}]
     
     send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(to=to, html_content=html_content, sender=sender, subject=subject)
@@ -0,0 +1,99 @@
+"""
+Import-time budget for the API process: imports `app.main` in a fresh interpreter with
+`python -X importtime` and fails if it is too slow, too large, or pulls in worker-only
+modules.
+
+    python -m benchmarks.importtime --budget-ms 1500 --max-rss-mb 150
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Modules the API must not load at import time: worker-only code, and the Celery and
+# Prometheus clients it only needs once it publishes a task or records a metric.
+FORBIDDEN_MODULES = ("app.workers.tasks", "app.workers.metrics", "sib_api_v3_sdk", "celery", "prometheus_client")
+# Budgets for a cold `import app.main`. They depend on the machine, so only this report
+# checks them; the test suite checks FORBIDDEN_MODULES.
+DEFAULT_BUDGET_MS = 1500
+DEFAULT_MAX_RSS_MB = 150
+
+RSS_SNIPPET = (
+    "import resource, sys; import {module}; "
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024))"
+)
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    (module, self_us, cumulative_us) for every `import time:` line.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str, top: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    rows = parse_importtime(result.stderr)
+    total_us = max((cumulative for _, _, cumulative in rows), default=0)
+    imported = {name for name, _, _ in rows}
+
+    rss = subprocess.run(
+        [sys.executable, "-c", RSS_SNIPPET.format(module=module)],
+        capture_output=True, text=True, check=True,
+    )
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "max_rss_mb": round(int(rss.stdout.strip()) / 2**20, 1),
+        "modules_imported": len(imported),
+        "forbidden_imported": sorted(m for m in FORBIDDEN_MODULES if m in imported),
+        "slowest_self_ms": [
+            {"module": name, "self_ms": round(self_us / 1000, 1)}
+            for name, self_us, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+        ],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evently API import-time budget.")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--max-rss-mb", type=float, default=DEFAULT_MAX_RSS_MB)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list.")
+    parser.add_argument("--output", default="-", help="Report path, '-' for stdout.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = measure(args.module, args.top)
+    report["budget_ms"] = args.budget_ms
+    report["max_rss_budget_mb"] = args.max_rss_mb
+
+    body = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(body)
+    else:
+        with open(args.output, "w") as f:
+            f.write(body)
+
+    problems = []
+    if report["total_ms"] > args.budget_ms:
+        problems.append(f"import took {report['total_ms']} ms (budget {args.budget_ms} ms)")
+    if report["max_rss_mb"] > args.max_rss_mb:
+        problems.append(f"max RSS {report['max_rss_mb']} MB (budget {args.max_rss_mb} MB)")
+    if report["forbidden_imported"]:
+        problems.append(f"worker-only modules imported: {', '.join(report['forbidden_imported'])}")
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if problems:
+        sys.exit(1)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Awaitable, Callable, List
+
+
+class LoadResult:
+    """
+    Latencies and status codes collected while driving one scenario.
+    """
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.status_codes: Counter = Counter()
+        self.errors = 0
+        self.started_at = 0.0
+        self.finished_at = 0.0
+
+    def record(self, latency: float, status_code: int | str):
+        self.latencies.append(latency)
+        self.status_codes[str(status_code)] += 1
+
+    def summary(self) -> dict:
+        duration = max(self.finished_at - self.started_at, 1e-9)
+        ordered = sorted(self.latencies)
+        return {
+            "requests": len(ordered),
+            "errors": self.errors,
+            "duration_s": round(duration, 4),
+            "throughput_rps": round(len(ordered) / duration, 2),
+            "latency_ms": {
+                "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else None,
+                "p50": percentile(ordered, 50),
+                "p95": percentile(ordered, 95),
+                "p99": percentile(ordered, 99),
+                "max": round(ordered[-1] * 1000, 3) if ordered else None,
+            },
+            "status_codes": dict(self.status_codes),
+        }
+
+
+def percentile(ordered: List[float], pct: float) -> float | None:
+    """
+    Nearest-rank percentile of an already sorted list of seconds, in milliseconds.
+    """
+    if not ordered:
+        return None
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return round(ordered[min(rank, len(ordered) - 1)] * 1000, 3)
+
+
+async def run_load(
+    operation: Callable[[int], Awaitable[int | str]],
+    *,
+    total: int,
+    concurrency: int,
+    expected_errors: tuple = (),
+) -> LoadResult:
+    """
+    Runs `operation(i)` for i in range(total) with at most `concurrency` in flight.
+    The operation returns a status code; exceptions count as errors.
+    """
+    result = LoadResult()
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                status_code = await operation(i)
+            except expected_errors as exc:
+                status_code = type(exc).__name__
+            except Exception:
+                result.errors += 1
+                continue
+            result.record(time.perf_counter() - started, status_code)
+
+    result.started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.finished_at = time.perf_counter()
+    return result
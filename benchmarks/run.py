@@ -0,0 +1,115 @@
+"""
+Runs the booking pipeline benchmarks and writes a JSON report.
+
+    python -m benchmarks.run --scenario all --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks import harness
+from benchmarks.scenarios import DEFAULT_PARAMS, SCENARIOS
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evently booking pipeline benchmarks.")
+    parser.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    parser.add_argument("--database-url", default=harness.DEFAULT_DATABASE_URL,
+                        help="Throwaway database; all tables are dropped and recreated per scenario.")
+    parser.add_argument("--redis-url", default=None, help="Real Redis to use instead of fakeredis.")
+    parser.add_argument("--base-url", default=None,
+                        help="Drive an already running server sharing the same database instead of the in-process app.")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--no-query-budgets", action="store_true",
+                        help="Do not fail requests that exceed their endpoint's declared query budget.")
+    parser.add_argument("--set", action="append", default=[], metavar="SCENARIO.PARAM=VALUE",
+                        help="Override a scenario parameter, e.g. flash_sale.users=2000")
+    parser.add_argument("--output", default="-", help="Report path, '-' for stdout.")
+    return parser.parse_args(argv)
+
+
+def scenario_params(args) -> dict:
+    params = {name: dict(values, seed=args.seed) for name, values in DEFAULT_PARAMS.items()}
+    for override in args.set:
+        key, _, value = override.partition("=")
+        name, _, param = key.partition(".")
+        if name not in params or not param:
+            raise SystemExit(f"Invalid override: {override}")
+        default = params[name].get(param)
+        params[name][param] = type(default)(value) if default is not None else value
+    return params
+
+
+async def main(args) -> dict:
+    harness.configure(args.database_url, args.redis_url, enforce_query_budgets=not args.no_query_budgets)
+    params = scenario_params(args)
+    selected = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "database": args.database_url.split("://", 1)[0],
+            "redis": "real" if args.redis_url else "fakeredis",
+            "target": args.base_url or "in-process",
+            "params": {name: params[name] for name in selected},
+        },
+        "scenarios": {},
+    }
+
+    async with harness.make_client(args.base_url) as client:
+        for name in selected:
+            await harness.reset_database()
+            await harness.flush_cache()
+            report["scenarios"][name] = await SCENARIOS[name](client, params[name])
+
+    return report
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+    body = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(body)
+    else:
+        with open(args.output, "w") as f:
+            f.write(body)
+
+    failed = [
+        name for name, result in report["scenarios"].items()
+        if not all(v for k, v in result.get("invariants", {}).items() if isinstance(v, bool))
+    ]
+    if failed:
+        print(f"Invariant violations in: {', '.join(failed)}", file=sys.stderr)
+
+    # Server errors include requests that blew their query budget.
+    server_errors = [
+        name for name, result in report["scenarios"].items()
+        for phase in result.values()
+        if isinstance(phase, dict) and any(code.startswith("5") for code in phase.get("status_codes", {}))
+    ]
+    if server_errors:
+        print(f"Server errors in: {', '.join(sorted(set(server_errors)))}", file=sys.stderr)
+
+    over_budget = [
+        name for name, result in report["scenarios"].items()
+        if not result.get("create_booking_statements", {}).get("within_budget", True)
+    ]
+    if over_budget:
+        print(f"create_booking exceeded its statement budget in: {', '.join(over_budget)}", file=sys.stderr)
+
+    if failed or server_errors or over_budget:
+        sys.exit(1)
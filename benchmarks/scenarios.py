@@ -0,0 +1,208 @@
+import random
+from collections import Counter
+
+from benchmarks import harness
+from benchmarks.loadgen import run_load
+
+
+async def counted_create_booking(booking_crud, statement_counts, **kwargs):
+    """
+    Runs create_booking in its own session, recording how many statements it executed.
+    """
+    from app.core.query_counter import count_queries
+    from app.db.session import AsyncSessionLocal
+
+    with count_queries() as stats:
+        async with AsyncSessionLocal() as db:
+            result = await booking_crud.create_booking(db=db, **kwargs)
+    statement_counts.append(stats.count)
+    return result
+
+
+def statement_budget_report(statement_counts, budget) -> dict:
+    return {
+        "budget": budget,
+        "max": max(statement_counts, default=0),
+        "within_budget": max(statement_counts, default=0) <= budget,
+    }
+
+
+async def flash_sale(client, params: dict) -> dict:
+    """
+    Every user requests tickets for one event at once: first the API enqueue path,
+    then the worker booking path draining the same requests concurrently.
+    """
+    from fastapi import HTTPException
+    from app.crud import booking as booking_crud
+    from app.models import models
+    from app.schemas import schemas
+
+    rng = random.Random(params["seed"])
+    [admin] = await harness.seed_users(1, prefix="admin", admin=True)
+    users = await harness.seed_users(params["users"])
+    [event_id] = await harness.seed_events(1, creator_id=admin["id"], capacity=params["capacity"])
+    requests = [(user, rng.randint(1, params["max_tickets"])) for user in users]
+
+    async def enqueue(i):
+        user, tickets = requests[i]
+        response = await client.post(
+            "/bookings", json={"event_id": event_id, "tickets_booked": tickets}, headers=harness.auth(user)
+        )
+        return response.status_code
+
+    enqueue_result = await run_load(enqueue, total=len(requests), concurrency=params["concurrency"])
+
+    outcomes = Counter()
+    statement_counts = []
+
+    async def process(i):
+        user, tickets = requests[i]
+        result = await counted_create_booking(
+            booking_crud,
+            statement_counts,
+            booking=schemas.BookingCreate(event_id=event_id, tickets_booked=tickets),
+            user_id=user["id"],
+        )
+        outcome = "booked" if isinstance(result, models.Booking) else "waitlisted"
+        outcomes[outcome] += 1
+        return outcome
+
+    process_result = await run_load(
+        process, total=len(requests), concurrency=params["workers"], expected_errors=(HTTPException,)
+    )
+
+    return {
+        "enqueue": enqueue_result.summary(),
+        "process": process_result.summary(),
+        "outcomes": dict(outcomes),
+        "create_booking_statements": statement_budget_report(
+            statement_counts, booking_crud.create_booking.query_budget
+        ),
+        "invariants": await harness.check_invariants(),
+    }
+
+
+async def browse(client, params: dict) -> dict:
+    """
+    Read-heavy public traffic: event list pages, filtered searches and single event
+    lookups, cold cache first.
+    """
+    rng = random.Random(params["seed"])
+    [admin] = await harness.seed_users(1, prefix="admin", admin=True)
+    event_ids = await harness.seed_events(params["events"], creator_id=admin["id"], capacity=params["capacity"])
+    await harness.flush_cache()
+
+    page_size = 20
+    pages = max(params["events"] // page_size, 1)
+
+    def pick_path():
+        roll = rng.random()
+        if roll < params["detail_ratio"]:
+            return f"/events/{rng.choice(event_ids)}"
+        if roll < params["detail_ratio"] + params["search_ratio"]:
+            return rng.choice([
+                f"/events?venue=Venue%20{rng.randrange(25)}&upcoming=true",
+                f"/events?q=Event%20{rng.randrange(100)}",
+            ])
+        return f"/events?skip={rng.randrange(pages) * page_size}&limit={page_size}"
+
+    paths = [pick_path() for _ in range(params["requests"])]
+
+    async def read(i):
+        response = await client.get(paths[i])
+        return response.status_code
+
+    result = await run_load(read, total=len(paths), concurrency=params["concurrency"])
+    return {"load": result.summary(), "invariants": await harness.check_invariants()}
+
+
+async def login_storm(client, params: dict) -> dict:
+    """
+    Many users logging in at once, which is dominated by password hash verification.
+    """
+    users = await harness.seed_users(params["users"], prefix="login")
+
+    async def login(i):
+        user = users[i % len(users)]
+        response = await client.post(
+            "/auth/login", data={"username": user["email"], "password": harness.BENCH_PASSWORD}
+        )
+        return response.status_code
+
+    result = await run_load(login, total=params["requests"], concurrency=params["concurrency"])
+    return {"load": result.summary()}
+
+
+async def cancel_churn(client, params: dict) -> dict:
+    """
+    A sold-out event with a waitlist: holders cancel through the API while new requests
+    keep joining the waitlist, so every cancellation promotes someone.
+    """
+    from fastapi import HTTPException
+    from app.crud import booking as booking_crud
+    from app.db.session import AsyncSessionLocal
+    from app.models import models
+    from app.schemas import schemas
+
+    rng = random.Random(params["seed"])
+    capacity = params["capacity"]
+    [admin] = await harness.seed_users(1, prefix="admin", admin=True)
+    holders = await harness.seed_users(capacity, prefix="holder")
+    waiters = await harness.seed_users(params["waitlist"], prefix="waiter")
+    [event_id] = await harness.seed_events(1, creator_id=admin["id"], capacity=capacity, booked_seats=capacity)
+
+    async with AsyncSessionLocal() as db:
+        bookings = [
+            models.Booking(user_id=holder["id"], event_id=event_id, tickets_booked=1) for holder in holders
+        ]
+        db.add_all(bookings)
+        await db.commit()
+        booking_owners = [(b.id, holder) for b, holder in zip(bookings, holders)]
+
+    statement_counts = []
+
+    async def join_waitlist(i):
+        await counted_create_booking(
+            booking_crud,
+            statement_counts,
+            booking=schemas.BookingCreate(event_id=event_id, tickets_booked=1),
+            user_id=waiters[i]["id"],
+        )
+        return "joined"
+
+    waitlist_result = await run_load(
+        join_waitlist, total=len(waiters), concurrency=params["workers"], expected_errors=(HTTPException,)
+    )
+
+    cancellations = rng.sample(booking_owners, min(params["cancellations"], len(booking_owners)))
+
+    async def cancel(i):
+        booking_id, holder = cancellations[i]
+        response = await client.post(f"/bookings/{booking_id}/cancel", headers=harness.auth(holder))
+        return response.status_code
+
+    cancel_result = await run_load(cancel, total=len(cancellations), concurrency=params["concurrency"])
+
+    return {
+        "waitlist_join": waitlist_result.summary(),
+        "cancel": cancel_result.summary(),
+        "create_booking_statements": statement_budget_report(
+            statement_counts, booking_crud.create_booking.query_budget
+        ),
+        "invariants": await harness.check_invariants(),
+    }
+
+
+SCENARIOS = {
+    "flash_sale": flash_sale,
+    "browse": browse,
+    "login_storm": login_storm,
+    "cancel_churn": cancel_churn,
+}
+
+DEFAULT_PARAMS = {
+    "flash_sale": {"users": 500, "capacity": 200, "max_tickets": 4, "concurrency": 50, "workers": 8},
+    "browse": {"events": 500, "capacity": 1000, "requests": 5000, "detail_ratio": 0.3, "search_ratio": 0.2, "concurrency": 50},
+    "login_storm": {"users": 50, "requests": 200, "concurrency": 20},
+    "cancel_churn": {"capacity": 200, "waitlist": 300, "cancellations": 150, "concurrency": 20, "workers": 8},
+}
@@ -0,0 +1,157 @@
+"""
+Measures response serialization cost for large booking and event lists, comparing
+FastAPI's default response path, ORJSONResponse, and pre-rendered output from
+`model_response` (orjson) or pydantic-core.
+
+    python -m benchmarks.serialization --rows 5000 --output serialization.json
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List
+
+import orjson
+
+from app.core.responses import _adapter, dump_json
+from app.models import models
+from app.schemas import schemas
+
+
+def make_events(n: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=i,
+            name=f"Bench Event {i}",
+            venue=f"Venue {i % 25}",
+            event_time=now + timedelta(days=i % 365),
+            on_sale_at=None,
+            capacity=1000,
+            booked_seats=i % 1000,
+            status=models.EventStatus.ACTIVE,
+            shard_count=0,
+            created_by=1,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(n)
+    ]
+
+
+def make_bookings(n: int) -> list:
+    now = datetime.now(timezone.utc)
+    events = make_events(min(n, 500))
+    return [
+        SimpleNamespace(
+            id=i,
+            event_id=events[i % len(events)].id,
+            tickets_booked=1 + i % 4,
+            user_id=1,
+            status=models.BookingStatus.CONFIRMED,
+            booked_at=now,
+            event=events[i % len(events)],
+        )
+        for i in range(n)
+    ]
+
+
+def make_overview(days: int) -> schemas.AnalyticsOverview:
+    start = datetime.now(timezone.utc).date()
+    return schemas.AnalyticsOverview(
+        total_confirmed_bookings=days * 100,
+        capacity_utilization_percentage=73.5,
+        most_popular_events=[
+            schemas.PopularEvent(event_id=i, event_name=f"Bench Event {i}", booking_count=1000 - i)
+            for i in range(10)
+        ],
+        cancellation_rate_percentage=4.2,
+        daily_booking_stats=[
+            schemas.DailyBookingStat(date=(start - timedelta(days=d)).isoformat(), booking_count=d)
+            for d in range(days)
+        ],
+    )
+
+
+def fastapi_default(response_type, value) -> bytes:
+    # response_model validation, then jsonable serialization and JSONResponse.render.
+    adapter = _adapter(response_type)
+    content = adapter.dump_python(adapter.validate_python(value, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def orjson_response(response_type, value) -> bytes:
+    # response_model validation, then ORJSONResponse.render.
+    adapter = _adapter(response_type)
+    return orjson.dumps(adapter.dump_python(adapter.validate_python(value, from_attributes=True), mode="json"))
+
+
+def model_response(response_type, value) -> bytes:
+    # app.core.responses.model_response: one validation, rendered by orjson.
+    return dump_json(response_type, value)
+
+
+def pydantic_core(response_type, value) -> bytes:
+    # One validation, rendered by pydantic-core's own serializer.
+    adapter = _adapter(response_type)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+STRATEGIES = {
+    "fastapi_default": fastapi_default,
+    "orjson": orjson_response,
+    "model_response": model_response,
+    "pydantic_core": pydantic_core,
+}
+
+
+def measure(render, response_type, value, repeat: int) -> dict:
+    render(response_type, value)  # warm up the adapters
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = render(response_type, value)
+        timings.append(time.perf_counter() - started)
+    return {
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "bytes": len(body),
+    }
+
+
+def main(args) -> dict:
+    payloads = {
+        "bookings": (List[schemas.Booking], make_bookings(args.rows)),
+        "events": (List[schemas.Event], make_events(args.rows)),
+        "analytics_overview": (schemas.AnalyticsOverview, make_overview(args.days)),
+    }
+    return {
+        "meta": {"rows": args.rows, "days": args.days, "repeat": args.repeat},
+        "payloads": {
+            name: {
+                strategy: measure(render, response_type, value, args.repeat)
+                for strategy, render in STRATEGIES.items()
+            }
+            for name, (response_type, value) in payloads.items()
+        },
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evently response serialization benchmarks.")
+    parser.add_argument("--rows", type=int, default=5000, help="Bookings and events per list.")
+    parser.add_argument("--days", type=int, default=365, help="Days in the analytics daily series.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default="-", help="Report path, '-' for stdout.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    body = json.dumps(main(args), indent=2)
+    if args.output == "-":
+        print(body)
+    else:
+        with open(args.output, "w") as f:
+            f.write(body)
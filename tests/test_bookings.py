@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks import harness
+from app.crud import archive as archive_crud
+from app.db.session import AsyncSessionLocal
+from app.models import models
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_full_view_keeps_bookings_whose_event_is_gone(client, users, seed_event):
+    event_id = await seed_event()
+    event_time = datetime.now(timezone.utc) - timedelta(days=400)
+    async with AsyncSessionLocal() as db:
+        # Archived bookings have no foreign key, so they can outlive a deleted event.
+        await archive_crud._ensure_partition(db, "bookings_archive", archive_crud._month_start(event_time))
+        db.add(models.BookingArchive(
+            id=1000, event_time=event_time, user_id=users[0]["id"], event_id=event_id + 1000,
+            tickets_booked=2, status=models.BookingStatus.CONFIRMED, booked_at=datetime.utcnow(),
+        ))
+        await db.commit()
+
+    for _ in range(2):  # a cold and a warm booking history
+        response = await client.get("/users/me/bookings", params={"view": "full"}, headers=harness.auth(users[0]))
+        assert response.status_code == 200
+        [booking] = response.json()
+        assert (booking["id"], booking["event"]) == (1000, None)
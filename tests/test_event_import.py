@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks import harness
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_bulk_updates_only_write_the_columns_a_row_sets(client, admin):
+    event_time = datetime.now(timezone.utc) + timedelta(days=30)
+    on_sale_at = (datetime.now(timezone.utc) + timedelta(days=1)).replace(microsecond=0)
+    event_ids = []
+    for i in range(2):
+        response = await client.post(
+            "/events",
+            json={
+                "name": f"Import {i}", "venue": "Hall", "event_time": event_time.isoformat(),
+                "capacity": 10, "on_sale_at": on_sale_at.isoformat(),
+            },
+            headers=harness.auth(admin),
+        )
+        assert response.status_code == 201
+        event_ids.append(response.json()["id"])
+
+    rows = [
+        # Leaves on_sale_at out, so the event keeps it.
+        {"id": event_ids[0], "name": "Renamed", "venue": "Hall", "event_time": event_time.isoformat(), "capacity": 20},
+        # Clears it explicitly.
+        {"id": event_ids[1], "name": "Import 1", "venue": "Hall", "event_time": event_time.isoformat(),
+         "capacity": 10, "on_sale_at": None},
+    ]
+    response = await client.post("/events/bulk", json=rows, headers=harness.auth(admin))
+    assert response.status_code == 200
+    assert sorted(response.json()["updated"]) == sorted(event_ids)
+
+    kept = (await client.get(f"/events/{event_ids[0]}")).json()
+    assert (kept["name"], kept["capacity"]) == ("Renamed", 20)
+    assert datetime.fromisoformat(kept["on_sale_at"]) == on_sale_at
+    cleared = (await client.get(f"/events/{event_ids[1]}")).json()
+    assert cleared["on_sale_at"] is None
@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks import harness
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_capacity_cannot_drop_below_booked_seats(client, admin, seed_event):
+    event_id = await seed_event(capacity=10, booked_seats=5)
+    event = {
+        "name": "Bench Event", "venue": "Hall",
+        "event_time": (datetime.now(timezone.utc) + timedelta(days=1)).isoformat(),
+    }
+
+    response = await client.put(f"/events/{event_id}", json={**event, "capacity": 4}, headers=harness.auth(admin))
+    assert response.status_code == 400
+
+    response = await client.put(f"/events/{event_id}", json={**event, "capacity": 5}, headers=harness.auth(admin))
+    assert response.status_code == 200
+    assert response.json()["capacity"] == 5
@@ -0,0 +1,21 @@
+"""
+Keeps the API's cold start small: `import app.main` runs in a fresh interpreter and must
+not load worker-only modules, Celery or prometheus_client. Timings vary too much between
+machines to assert here; `python -m benchmarks.importtime` reports them against a budget.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks import importtime
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_api_does_not_import_worker_modules():
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.main; print('\\n'.join(sys.modules))"],
+        capture_output=True, text=True, check=True, cwd=ROOT,
+    )
+    imported = set(result.stdout.split())
+    assert [module for module in importtime.FORBIDDEN_MODULES if module in imported] == []
@@ -0,0 +1,253 @@
+"""
+Every endpoint declaring a query budget is run down its most expensive path with a cold
+cache, and the SQL statements it executed are checked against the budget. The worker-side
+create_booking never passes through the HTTP middleware, so its budget is checked here
+directly.
+"""
+import pytest
+
+from benchmarks import harness
+from app.core.query_counter import count_queries
+from app.crud import booking as booking_crud
+from app.db.session import AsyncSessionLocal
+from app.main import app
+from app.models import models
+from app.schemas import schemas
+
+pytestmark = pytest.mark.anyio
+
+BUDGETED_ROUTES = {
+    ("POST", "/bookings"),
+    ("POST", "/bookings/cart"),
+    ("GET", "/users/me/bookings"),
+    ("POST", "/bookings/{booking_id}/cancel"),
+    ("GET", "/events/{event_id}/waitlist/me"),
+    ("GET", "/events"),
+    ("GET", "/events/{event_id}"),
+    ("POST", "/events/{event_id}/holds"),
+    ("POST", "/holds/{hold_id}/confirm"),
+}
+
+
+def route_budget(method: str, path: str) -> int:
+    for route in app.routes:
+        if getattr(route, "path", None) == path and method in getattr(route, "methods", ()):
+            return route.endpoint.query_budget
+    raise AssertionError(f"No route {method} {path}")
+
+
+async def within_budget(client, method: str, route_path: str, path: str | None = None, **kwargs):
+    """
+    Sends one request to a budgeted route and checks its statement count.
+    """
+    budget = route_budget(method, route_path)
+    with count_queries() as stats:
+        response = await client.request(method, path or route_path, **kwargs)
+    assert stats.count <= budget, f"{method} {route_path} executed {stats.count} statements, budget is {budget}"
+    return response
+
+
+async def create_booking(event_id: int, user: dict, tickets: int = 1):
+    """
+    Runs the worker booking path in its own session, as the Celery task does.
+    """
+    with count_queries() as stats:
+        async with AsyncSessionLocal() as db:
+            result = await booking_crud.create_booking(
+                db=db,
+                booking=schemas.BookingCreate(event_id=event_id, tickets_booked=tickets),
+                user_id=user["id"],
+            )
+    return result, stats
+
+
+async def shard_event(client, admin: dict, event_id: int, shard_count: int):
+    response = await client.put(
+        f"/events/{event_id}/seat-shards", json={"shard_count": shard_count}, headers=harness.auth(admin)
+    )
+    assert response.status_code == 200
+
+
+def test_every_budgeted_route_is_covered():
+    budgeted = {
+        (method, route.path)
+        for route in app.routes
+        if hasattr(getattr(route, "endpoint", None), "query_budget")
+        for method in route.methods
+    }
+    assert budgeted == BUDGETED_ROUTES
+
+
+async def test_request_booking(client, users, seed_event):
+    event_id = await seed_event()
+    response = await within_budget(
+        client, "POST", "/bookings",
+        json={"event_id": event_id, "tickets_booked": 1}, headers=harness.auth(users[0]),
+    )
+    assert response.status_code == 202
+
+
+async def test_request_cart_booking(client, users, seed_event):
+    event_ids = [await seed_event(), await seed_event()]
+    response = await within_budget(
+        client, "POST", "/bookings/cart",
+        json={"lines": [{"event_id": event_id, "tickets_booked": 1} for event_id in event_ids]},
+        headers=harness.auth(users[0]),
+    )
+    assert response.status_code == 202
+
+
+@pytest.mark.parametrize("view", ["full", "summary", "normalized"])
+async def test_read_user_bookings_cold(client, users, seed_event, view):
+    for event_id in [await seed_event(), await seed_event()]:
+        await create_booking(event_id, users[0])
+
+    response = await within_budget(
+        client, "GET", "/users/me/bookings", params={"view": view}, headers=harness.auth(users[0])
+    )
+    assert response.status_code == 200
+
+
+async def test_cancel_a_booking_with_promotion(client, users, seed_event):
+    event_id = await seed_event(capacity=1)
+    booking, _ = await create_booking(event_id, users[0])
+    entry, _ = await create_booking(event_id, users[1])
+    assert isinstance(entry, models.WaitlistEntry)
+
+    response = await within_budget(
+        client, "POST", "/bookings/{booking_id}/cancel", f"/bookings/{booking.id}/cancel", headers=harness.auth(users[0])
+    )
+    assert response.status_code == 200
+
+
+async def test_read_waitlist_position_cold(client, users, seed_event):
+    event_id = await seed_event(capacity=1)
+    await create_booking(event_id, users[0])
+    await create_booking(event_id, users[1])
+    await create_booking(event_id, users[2], tickets=2)
+
+    response = await within_budget(
+        client, "GET", "/events/{event_id}/waitlist/me", f"/events/{event_id}/waitlist/me", headers=harness.auth(users[2])
+    )
+    assert response.status_code == 200
+    assert response.json()["tickets_ahead"] == 1
+
+
+async def test_read_events_cold(client, seed_event):
+    for _ in range(3):
+        await seed_event()
+
+    for params in ({}, {"view": "summary"}, {"upcoming": "true", "q": "Bench"}):
+        await harness.flush_cache()
+        response = await within_budget(client, "GET", "/events", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+
+
+async def test_read_event_cold(client, seed_event):
+    event_id = await seed_event()
+    response = await within_budget(client, "GET", "/events/{event_id}", f"/events/{event_id}")
+    assert response.status_code == 200
+
+
+async def test_hold_seats_on_fragmented_shards(client, admin, users, seed_event):
+    event_id = await seed_event(capacity=5)
+    await shard_event(client, admin, event_id, shard_count=2)
+    # The first hold loads the event and takes a seat from the roomier shard...
+    response = await within_budget(
+        client, "POST", "/events/{event_id}/holds", f"/events/{event_id}/holds",
+        json={"tickets": 1}, headers=harness.auth(users[0]),
+    )
+    assert response.status_code == 201
+    # ...so no single shard has room for the next one and the event is rebalanced.
+    response = await within_budget(
+        client, "POST", "/events/{event_id}/holds", f"/events/{event_id}/holds",
+        json={"tickets": 3}, headers=harness.auth(users[1]),
+    )
+    assert response.status_code == 201
+
+
+async def test_confirm_hold(client, users, seed_event):
+    event_id = await seed_event()
+    response = await client.post(
+        f"/events/{event_id}/holds", json={"tickets": 2}, headers=harness.auth(users[0])
+    )
+    assert response.status_code == 201
+
+    response = await within_budget(
+        client, "POST", "/holds/{hold_id}/confirm", f"/holds/{response.json()['id']}/confirm", headers=harness.auth(users[0])
+    )
+    assert response.status_code == 200
+
+
+async def test_create_booking_within_budget(users, seed_event):
+    budget = booking_crud.create_booking.query_budget
+    event_id = await seed_event(capacity=1)
+
+    booking, stats = await create_booking(event_id, users[0])
+    assert isinstance(booking, models.Booking)
+    assert stats.count <= budget
+
+    entry, stats = await create_booking(event_id, users[1])
+    assert isinstance(entry, models.WaitlistEntry)
+    assert stats.count <= budget
+
+
+async def test_create_booking_statements(users, seed_event):
+    event_id = await seed_event(capacity=1)
+
+    # UPDATE ... RETURNING claims the seat, INSERT ... RETURNING adds the booking.
+    booking, stats = await create_booking(event_id, users[0])
+    assert isinstance(booking, models.Booking)
+    assert stats.count == 2
+
+    # The failed claim, the locking SELECT, the pending entry check and the INSERT.
+    entry, stats = await create_booking(event_id, users[1])
+    assert isinstance(entry, models.WaitlistEntry)
+    assert stats.count == 4
+
+
+async def test_create_booking_on_full_shards(client, admin, users, seed_event):
+    event_id = await seed_event(capacity=4)
+    await shard_event(client, admin, event_id, shard_count=2)
+    await create_booking(event_id, users[0], tickets=1)
+    await create_booking(event_id, users[1], tickets=2)
+
+    # Both shard claims fail, then the event is locked and its shards are locked to find
+    # that only one seat is left, before the waitlist check and INSERT.
+    entry, stats = await create_booking(event_id, users[2], tickets=3)
+    assert isinstance(entry, models.WaitlistEntry)
+    assert stats.count == booking_crud.create_booking.query_budget == 6
+
+
+async def test_cancel_a_booking_statements(client, users, seed_event):
+    event_id = await seed_event(capacity=1)
+    booking, _ = await create_booking(event_id, users[0])
+    await create_booking(event_id, users[1])
+
+    with count_queries() as stats:
+        response = await client.post(f"/bookings/{booking.id}/cancel", headers=harness.auth(users[0]))
+    assert response.status_code == 200
+    # The user, the locked booking and event, the cancellation, the returned seats, the
+    # next waitlist entry, its claimed seats, its booking and the fulfilled entry.
+    assert stats.count == 8
+
+
+async def test_cancel_a_booking_rebalancing_promotion(client, admin, users, seed_event):
+    event_id = await seed_event(capacity=4)
+    await shard_event(client, admin, event_id, shard_count=2)
+    await create_booking(event_id, users[0], tickets=1)
+    booking, _ = await create_booking(event_id, users[1], tickets=2)
+    entry, _ = await create_booking(event_id, users[2], tickets=3)
+    assert isinstance(entry, models.WaitlistEntry)
+
+    # Three seats are free after the cancellation, but no single shard has three, so the
+    # promotion rebalances the shards.
+    response = await within_budget(
+        client, "POST", "/bookings/{booking_id}/cancel", f"/bookings/{booking.id}/cancel", headers=harness.auth(users[1])
+    )
+    assert response.status_code == 200
+
+    async with AsyncSessionLocal() as db:
+        [promoted] = await booking_crud.get_bookings_by_user(db, users[2]["id"])
+    assert promoted.tickets_booked == 3
@@ -0,0 +1,57 @@
+import gzip
+
+import pytest
+from fakeredis import aioredis as fake_aioredis
+from starlette.requests import Request
+
+from app.services import response_cache
+
+pytestmark = pytest.mark.anyio
+
+
+def make_request(**headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/events",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+async def test_variants_are_compressed_once(monkeypatch):
+    redis_client = fake_aioredis.FakeRedis()
+    calls = []
+    original = response_cache.compress
+
+    def counting_compress(body, encoding):
+        calls.append(encoding)
+        return original(body, encoding)
+
+    monkeypatch.setattr(response_cache, "compress", counting_compress)
+    body = b"[" + b",".join(b'{"id":%d}' % i for i in range(500)) + b"]"
+
+    for _ in range(3):
+        response = await response_cache.render(make_request(accept_encoding="gzip"), body, redis_client)
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(response.body) == body
+    assert calls == ["gzip"]
+
+    changed = body[:-1] + b',{"id":500}]'
+    response = await response_cache.render(make_request(accept_encoding="gzip"), changed, redis_client)
+    assert gzip.decompress(response.body) == changed
+    assert calls == ["gzip", "gzip"]
+
+
+async def test_small_bodies_and_matching_etags_skip_compression(monkeypatch):
+    redis_client = fake_aioredis.FakeRedis()
+    monkeypatch.setattr(response_cache, "compress", pytest.fail)
+
+    response = await response_cache.render(make_request(accept_encoding="br"), b'{"id":1}', redis_client)
+    assert "content-encoding" not in response.headers
+
+    body = b"x" * response_cache.COMPRESSION_MIN_BYTES
+    etag = (await response_cache.render(make_request(), body, redis_client)).headers["etag"]
+    response = await response_cache.render(
+        make_request(accept_encoding="br", if_none_match=etag), body, redis_client
+    )
+    assert response.status_code == 304
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fakeredis import FakeServer, aioredis as fake_aioredis
+from fastapi import HTTPException
+
+from app.services import waiting_room
+
+pytestmark = pytest.mark.anyio
+
+EVENT_ID = 1
+
+
+async def open_room(redis_client, started_seconds_ago: float):
+    on_sale_at = datetime.now(timezone.utc) - timedelta(seconds=started_seconds_ago)
+    await waiting_room.publish_on_sale(redis_client, EVENT_ID, on_sale_at)
+
+
+async def test_concurrent_joins_share_one_place():
+    redis_client = fake_aioredis.FakeRedis(decode_responses=True)
+    await open_room(redis_client, started_seconds_ago=-60)
+
+    first, second = await asyncio.gather(
+        waiting_room.join(redis_client, EVENT_ID, 7), waiting_room.join(redis_client, EVENT_ID, 7)
+    )
+    assert first is not None and second is not None
+    assert first["token"] == second["token"]
+    assert first["position"] == second["position"] == 1
+
+    other = await waiting_room.join(redis_client, EVENT_ID, 8)
+    assert other["position"] == 2
+
+
+async def test_admitted_token_is_good_for_a_limited_number_of_requests():
+    redis_client = fake_aioredis.FakeRedis(decode_responses=True)
+    await open_room(redis_client, started_seconds_ago=10)
+    token = (await waiting_room.join(redis_client, EVENT_ID, 7))["token"]
+
+    with pytest.raises(HTTPException) as exc_info:
+        await waiting_room.check_admission(redis_client, EVENT_ID, 8, token)
+    assert exc_info.value.status_code == 403
+
+    for _ in range(waiting_room.WAITING_ROOM_TOKEN_USES):
+        await waiting_room.check_admission(redis_client, EVENT_ID, 7, token)
+    with pytest.raises(HTTPException) as exc_info:
+        await waiting_room.check_admission(redis_client, EVENT_ID, 7, token)
+    assert exc_info.value.status_code == 403
+
+
+async def test_publishing_a_room_while_redis_is_down_does_not_raise():
+    server = FakeServer()
+    server.connected = False
+    redis_client = fake_aioredis.FakeRedis(server=server, decode_responses=True)
+    # The event is already committed; the failure is only logged.
+    await open_room(redis_client, started_seconds_ago=-60)
@@ -0,0 +1,85 @@
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fakeredis import aioredis as fake_aioredis
+
+from app.services import waitlist_index
+
+pytestmark = pytest.mark.anyio
+
+EVENT_ID = 1
+START = datetime(2026, 3, 29, 1, 30)
+
+
+def make_entry(entry_id: int, user_id: int, created_at: datetime, tickets: int):
+    return SimpleNamespace(
+        id=entry_id, event_id=EVENT_ID, user_id=user_id, created_at=created_at, tickets_requested=tickets
+    )
+
+
+def expected_position(pending: list, user_id: int):
+    ordered = sorted(pending, key=lambda entry: (entry.created_at, entry.id))
+    tickets_ahead = 0
+    for rank, entry in enumerate(ordered):
+        if entry.user_id == user_id:
+            return waitlist_index._position(EVENT_ID, rank, tickets_ahead, entry.tickets_requested)
+        tickets_ahead += entry.tickets_requested
+    return None
+
+
+@pytest.fixture
+def pending(monkeypatch):
+    """
+    The pending entries the database would return, in its order.
+    """
+    entries = []
+
+    async def get_pending_entries(db, event_id):
+        return sorted(entries, key=lambda entry: (entry.created_at, entry.id))
+
+    monkeypatch.setattr(waitlist_index.waitlist_crud, "get_pending_entries", get_pending_entries)
+    return entries
+
+
+async def test_positions_match_the_database_order(pending):
+    redis_client = fake_aioredis.FakeRedis(decode_responses=True)
+    rng = random.Random(46)
+    # Few distinct timestamps, so many entries tie and rank by id.
+    for entry_id in range(1, 41):
+        created_at = START + timedelta(microseconds=rng.randrange(8))
+        pending.append(make_entry(entry_id, user_id=100 + entry_id, created_at=created_at, tickets=rng.randint(1, 4)))
+
+    # The first read rebuilds the mirror from the database.
+    for entry in pending:
+        assert await waitlist_index.get_position(redis_client, None, EVENT_ID, entry.user_id) == \
+            expected_position(pending, entry.user_id)
+
+    next_id = 41
+    for _ in range(60):
+        if pending and rng.random() < 0.4:
+            entry = pending.pop(rng.randrange(len(pending)))
+            await waitlist_index.remove(redis_client, [entry])
+        else:
+            # Joins may commit out of order, landing ahead of entries already mirrored.
+            created_at = START + timedelta(microseconds=rng.randrange(12))
+            entry = make_entry(next_id, user_id=100 + next_id, created_at=created_at, tickets=rng.randint(1, 4))
+            next_id += 1
+            pending.append(entry)
+            await waitlist_index.add(redis_client, [entry])
+
+        for user_id in [entry.user_id for entry in pending] + [99]:
+            found = await waitlist_index.get_position(redis_client, None, EVENT_ID, user_id)
+            assert found == expected_position(pending, user_id)
+
+
+async def test_readding_an_entry_keeps_its_place(pending):
+    redis_client = fake_aioredis.FakeRedis(decode_responses=True)
+    first = make_entry(1, user_id=10, created_at=START, tickets=2)
+    second = make_entry(2, user_id=20, created_at=START + timedelta(seconds=1), tickets=3)
+    pending += [first, second]
+    await waitlist_index.get_position(redis_client, None, EVENT_ID, 10)
+
+    await waitlist_index.add(redis_client, [first, second])
+    assert await waitlist_index.get_position(redis_client, None, EVENT_ID, 20) == expected_position(pending, 20)